@@ -1,59 +1,142 @@
+import glob
 import os
+import threading
 import time
 
-import vlc
+import config
+from event_log import event_log
 from utils import get_correct_path
 
 
-def play_sweep(channel):
-    """
-    Plays an audio sweep using VLC.
+class PlaybackEngine:
+    """Long-lived VLC instance and media player used for every sweep.
 
-    Args:
-        source (str): Path or URL of the audio file.
+    The user's vlcrc is parsed once, all sweep files in assets/Lossless are parsed
+    ahead of time and the same media player is reused, so starting a sweep costs
+    the same every time and memory stays flat over a long session.
     """
 
-    audio_file_path = get_correct_path(f"{channel}.mlp", "assets/Lossless")
-    # if config.lossless_audio:
-    #     audio_file_path = get_correct_path(f"{channel}.mlp", "assets/Lossless")
-    # else:
-    #     audio_file_path = get_correct_path(f"{channel}.mp4", "assets/Lossy")
+    def __init__(self, media_directory: str = "assets/Lossless"):
+        # Imported here so the silent engine works where VLC is not installed
+        import vlc
 
-    # Initialize VLC instance and media player
-    global player  # Keep reference to avoid garbage collection
+        self.vlc = vlc
+        self.playing_states = {
+            vlc.State.Opening,
+            vlc.State.Buffering,
+            vlc.State.Playing,
+        }
 
-    # Path to VLC preferences (vlcrc) in the current user profile
-    cfg = os.path.join(os.environ["APPDATA"], "vlc", "vlcrc")
-    # Create VLC instance that loads user config (no-ignore to actually use it)
-    vlc_instance = vlc.Instance("--no-ignore-config", f"--config={cfg}")
+        # Path to VLC preferences (vlcrc) in the current user profile
+        cfg = os.path.join(os.environ.get("APPDATA", ""), "vlc", "vlcrc")
+        # Create VLC instance that loads user config (no-ignore to actually use it)
+        if os.path.exists(cfg):
+            self.instance = vlc.Instance("--no-ignore-config", f"--config={cfg}")
+        else:
+            self.instance = vlc.Instance()
 
-    player = vlc_instance.media_player_new()
+        self.player = self.instance.media_player_new()
+        self.media_directory = media_directory
+        self.media: dict = {}
+        self._lock = threading.Lock()
 
-    try:
-        # Load media
-        media = vlc_instance.media_new(audio_file_path)
-        player.set_media(media)
+    def preload(self):
+        """Load and parse every sweep file so playback can start immediately."""
+        for audio_file_path in glob.glob(get_correct_path("*.mlp", self.media_directory)):
+            channel = os.path.splitext(os.path.basename(audio_file_path))[0]
+            self._load(channel, audio_file_path)
 
-        # Start playback
-        player.play()
-        time.sleep(1)  # Allow time for VLC to start playing
+    def _load(self, channel: str, audio_file_path: str):
+        media = self.instance.media_new(audio_file_path)
+        media.parse_with_options(self.vlc.MediaParseFlag.local, -1)
+        self.media[channel] = media
+        return media
 
-        # Wait for playback to complete
-        while player.get_state() in {
-            vlc.State.Opening,
-            vlc.State.Buffering,
-            vlc.State.Playing,
-        }:
-            time.sleep(1)
+    def play(self, channel: str):
+        """
+        Starts playing an audio sweep without waiting for it to finish.
+
+        Args:
+            channel (str): Name of the channel audio file to play (without extension).
+        """
+        with self._lock:
+            try:
+                media = self.media.get(channel) or self._load(
+                    channel, get_correct_path(f"{channel}.mlp", self.media_directory)
+                )
+                self.player.stop()
+                self.player.set_media(media)
+                self.player.play()
+            except Exception as e:
+                event_log.emit(
+                    "playback_error",
+                    message=f"{config.PRINTFORMAT['ERROR']} VLC playback error: {e}",
+                    channel=channel,
+                )
+
+    def stop(self):
+        """Stop the current playback."""
+        with self._lock:
+            self.player.stop()
 
-        # Check for errors
-        if player.get_state() == vlc.State.Error:
-            print(
-                f"Error: VLC could not play {audio_file_path}. Check your audio output settings."
+    def is_playing(self) -> bool:
+        """Return True while VLC is opening, buffering or playing the media."""
+        return self.player.get_state() in self.playing_states
+
+    def check_playback_errors(self, channel: str):
+        """Report if VLC failed to play the sweep."""
+        if self.player.get_state() == self.vlc.State.Error:
+            event_log.emit(
+                "playback_error",
+                message=f"{config.PRINTFORMAT['ERROR']} VLC could not play {channel}.mlp. Check your audio output settings.",
+                channel=channel,
             )
 
-    except Exception as e:
-        print(f"VLC playback error: {e}")
+
+class SilentPlaybackEngine:
+    """Plays nothing and reports a sweep as playing for SILENT_SWEEP_DURATION seconds.
+
+    Used with PLAYBACK_ENGINE = "silent" to run the workflow against the REW
+    emulator on machines without audio output or VLC.
+    """
+
+    def __init__(self, duration: float | None = None):
+        self.duration = config.SILENT_SWEEP_DURATION if duration is None else duration
+        self._ends = 0.0
+
+    def preload(self):
+        pass
+
+    def play(self, channel: str):
+        self._ends = time.monotonic() + self.duration
+
+    def stop(self):
+        self._ends = 0.0
+
+    def is_playing(self) -> bool:
+        return time.monotonic() < self._ends
+
+    def check_playback_errors(self, channel: str):
+        pass
+
+
+_playback_engine: PlaybackEngine | SilentPlaybackEngine | None = None
+_playback_engine_lock = threading.Lock()
+
+
+def get_playback_engine() -> PlaybackEngine | SilentPlaybackEngine:
+    """Return the shared playback engine, creating and preloading it on first use."""
+    global _playback_engine
+    with _playback_engine_lock:
+        if _playback_engine is None:
+            if config.PLAYBACK_ENGINE == "silent":
+                playback_engine = SilentPlaybackEngine()
+            else:
+                playback_engine = PlaybackEngine()
+            # Only keep an engine that preloaded, so a failure is retried on the next call
+            playback_engine.preload()
+            _playback_engine = playback_engine
+        return _playback_engine
 
 
 def get_audio_files():
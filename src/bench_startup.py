@@ -0,0 +1,114 @@
+"""Cold-start benchmark for the normal UI and the --serve mode.
+
+Runs the program several times and reports how long it takes until the UI has
+drawn its first frame and until the server accepts connections.
+
+    python src/bench_startup.py --runs 5
+    python src/bench_startup.py --exe dist/AutomatedSweeps.exe
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from config import SERVE_PORT
+from utils import get_ip
+
+TIMEOUT = 120.0
+
+
+def get_command(exe: str | None) -> list:
+    if exe:
+        return [exe]
+    return [sys.executable, os.path.join(os.path.dirname(__file__), "main.py")]
+
+
+def time_ui(command: list) -> dict:
+    """Seconds until the interpreter ran main.py and until the first frame was drawn."""
+    start = time.time()
+    result = subprocess.run(
+        command + ["--benchmark-startup"],
+        capture_output=True,
+        text=True,
+        timeout=TIMEOUT,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("startup "):
+            fields = dict(part.split("=") for part in line.split()[1:])
+            return {
+                "main": float(fields["main"]) - start,
+                "first_frame": float(fields["first_frame"]) - start,
+            }
+    raise RuntimeError(f"UI did not report its first frame: {result.stderr.strip()}")
+
+
+def time_serve(command: list) -> dict:
+    """Seconds until the server accepts connections."""
+    host = get_ip()
+    start = time.time()
+    server = subprocess.Popen(
+        command + ["--serve"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.time() - start < TIMEOUT:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                socket.create_connection((host, SERVE_PORT), timeout=0.1).close()
+                return {"listening": time.time() - start}
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Server did not listen within {TIMEOUT:.0f} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(runs: list) -> dict:
+    return {
+        key: {
+            "min": min(run[key] for run in runs),
+            "median": statistics.median(run[key] for run in runs),
+            "max": max(run[key] for run in runs),
+        }
+        for key in runs[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="Benchmark the built executable instead")
+    parser.add_argument("--mode", choices=("ui", "serve", "all"), default="all")
+    parser.add_argument("--output", help="Append the results to this JSONL file")
+    args = parser.parse_args()
+
+    command = get_command(args.exe)
+    benchmarks = {"ui": time_ui, "serve": time_serve}
+    modes = benchmarks if args.mode == "all" else [args.mode]
+
+    results = {
+        "time": time.time(),
+        "command": " ".join(command),
+        "runs": args.runs,
+    }
+    for mode in modes:
+        runs = [benchmarks[mode](command) for _ in range(args.runs)]
+        results[mode] = summarize(runs)
+        for key, stats in results[mode].items():
+            print(
+                f"{mode} {key}: median {stats['median']:.3f} s (min {stats['min']:.3f} s, max {stats['max']:.3f} s)"
+            )
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import os
 from collections import defaultdict
 
+from schedule import StepTable
+
 # Constants
 SETTINGS_FILE = "settings.json"
+JOURNAL_FILE = "session_journal.jsonl"
+EVENT_LOG_FILE = "session_events.jsonl"
+EVENT_LOG_MAX_BYTES = 5 * 1024 * 1024  # The log is moved to EVENT_LOG_FILE.1 at this size
 
 PAIR_CHANNEL_NAMES = {
     "Back Dolby": "BDL/BDR",
@@ -77,7 +83,7 @@ utility_steps: dict[str] = {
     "checkMic": "Not started",
 }
 
-measurement_schedule: list[dict] = []
+measurement_schedule: StepTable = StepTable()
 
 # lossless_audio: bool = True
 
@@ -86,21 +92,97 @@ measure_mic_position: bool = True
 measure_reference: bool = True
 
 measure_iterations: int = 1
+MAX_ITERATIONS = 99  # Upper limit of the iterations input
 
 measure_position_name: str = "Reference"
 
-# REW endpoints
-WARNING_ENDPOINT = "http://localhost:4735/application/warnings"
-ERROR_ENDPOINT = "http://localhost:4735/application/errors"
-MEASUREMENT_UUID_ENDPOINT = "http://localhost:4735/measurements/selected-uuid"
-MEASUREMENT_ENDPOINT = "http://localhost:4735/measurements"
-VERSION_ENDPOINT = "http://localhost:4735/version"
-BASE_URL_ENDPOINT = "http://localhost:4735"
+# Logging profile, set with the --debug startup flag. The production profile skips
+# debug formatting, devtools and the textual-serve debug mode.
+debug_logging: bool = False
+
+# REW endpoints (paths are relative to BASE_URL_ENDPOINT)
+REW_URL_ENV = "AUTOMATEDSWEEPS_REW_URL"  # Points the app at another REW, e.g. rew_emulator.py
+BASE_URL_ENDPOINT = os.environ.get(REW_URL_ENV, "http://localhost:4735")
+WARNING_ENDPOINT = "/application/warnings"
+ERROR_ENDPOINT = "/application/errors"
+LAST_WARNING_ENDPOINT = "/application/last-warning"
+LAST_ERROR_ENDPOINT = "/application/last-error"
+MEASUREMENT_UUID_ENDPOINT = "/measurements/selected-uuid"
+MEASUREMENT_ENDPOINT = "/measurements"
+VERSION_ENDPOINT = "/version"
+MEASURE_ENDPOINT = "/measure"
+
+# REW API client settings
+REW_TIMEOUT = 3.0  # Deadline in seconds for a single API call, including retries
+REW_RETRIES = 2  # Retries after the first attempt for connection errors and 5xx responses
+REW_BACKOFF = 0.1  # Initial backoff in seconds, doubled after every retry
+REW_POOL_SIZE = 4  # Keep-alive connections kept open to REW
+
+# How sweeps are taken in REW: "api" uses REW's measure command, "gui" automates
+# the Measure dialog with pyautogui and "auto" uses the API when REW supports it.
+MEASUREMENT_DRIVER = "auto"
+MEASURE_SWEEP_COMMAND = "Sweep"
+MEASURE_CANCEL_COMMAND = "Cancel"
+
+# How sweeps are played: "vlc" plays the audio files, "silent" only waits for the
+# length of a sweep, for running against rew_emulator.py on machines without audio
+PLAYBACK_ENGINE_ENV = "AUTOMATEDSWEEPS_PLAYBACK"
+PLAYBACK_ENGINE = os.environ.get(PLAYBACK_ENGINE_ENV, "vlc")
+EMULATOR_SWEEP_DURATION = 1.0  # Seconds an emulated sweep takes by default
+# Seconds a silent sweep plays, set to the sweep duration of the emulator in use
+SILENT_SWEEP_DURATION_ENV = "AUTOMATEDSWEEPS_SWEEP_DURATION"
+SILENT_SWEEP_DURATION = float(
+    os.environ.get(SILENT_SWEEP_DURATION_ENV, EMULATOR_SWEEP_DURATION)
+)
+
+# Sweep completion detection
+SWEEP_POLL_INTERVAL = 0.05  # Seconds between VLC playback state checks
+SWEEP_MEASUREMENT_POLL_INTERVAL = 0.1  # Seconds between checks for a new REW measurement
+SWEEP_START_GRACE = 2.0  # Seconds VLC may take to start playing before giving up on it
+SWEEP_TIMEOUT = 60.0  # Backstop in seconds for a whole sweep
+VERIFICATION_POLL_INTERVAL = 0.05  # Seconds between stop checks while waiting for verification
+
+# Button locator
+LOCATOR_CONFIDENCE = 0.85  # Minimum grayscale match score at full resolution
+LOCATOR_REGION_MARGIN = 50  # Pixels searched around the last known button position
+LOCATOR_PYRAMID_LEVELS = 1  # Times the screenshot is halved before the coarse search
+LOCATOR_SCALES = (1.0, 1.25, 1.5, 1.75, 2.0, 0.75)  # Display scaling factors to try
+
+# GUI action pacing
+PACING_MIN_PAUSE = 0.05  # Seconds pyautogui waits after every action
+PACING_POLL_INTERVAL = 0.05  # Seconds between checks whether the UI has reacted
+PACING_TIMEOUT = 5.0  # Seconds to wait for the UI to react before carrying on
+
+DIALOG_CLOSE_ATTEMPTS = 5  # Key presses tried to get REW back to its main window
+DIALOG_SETTLE_TIME = 0.3  # Seconds to wait for late popups once the dialogs are closed
+REW_MAIN_WINDOW_TITLE = "REW"  # Start of the title of REW's main window
 
 # Pyautogui positions
-REW_NAME_OFFSET = (-560, -642)
 REW_NOTES_OFFSET = (-560, -470)
 
+SUMMARY_CACHE_SIZE = 256  # Measurement summaries kept in memory
+
+MESSAGE_DRAIN_INTERVAL = 1 / 30  # Seconds between UI frames that apply queued worker messages
+CONSOLE_MAX_LINES = 500  # Lines kept in the on-screen console, the full log is on disk
+LOG_SCROLLBACK_LINES = 5000  # Lines read back from disk when the full log is opened
+
+# Measurement engine shared by the local UI and remote viewers
+ENGINE_HOST = "127.0.0.1"
+ENGINE_ADDRESS_ENV = "AUTOMATEDSWEEPS_ENGINE_ADDRESS"  # Passed to the served viewer processes
+ENGINE_KEY_ENV = "AUTOMATEDSWEEPS_ENGINE_KEY"
+SERVE_PORT = 8000  # textual-serve default
+API_PORT = 8001  # JSON and WebSocket API, see web_api.py
+WORKFLOW_STOP_TIMEOUT = 10.0  # Seconds a new run waits for the stopped workflow to exit
+VIEWER_MAX_BACKLOG = 100  # Batches queued for a viewer before it is sent a fresh snapshot
+DEBUG_LOG_RATE_LIMIT = 0.5  # Seconds between debug messages from high-volume log sites
+
+# Keywords used to classify REW warnings and errors, matched against title and message
+PROBLEM_TYPES = {
+    "clipping": ("clip",),
+    "timing": ("timing", "acoustic reference", "loopback"),
+    "low_snr": ("signal to noise", "snr", "noise", "level too low", "low level"),
+}
+
 PRINTFORMAT = {
     "OK": "[green][OK][/green]",
     "INFO": "[INFO]",
@@ -0,0 +1,129 @@
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+
+import config
+from event_log import format_message
+
+
+class EngineHost:
+    """Lets UIs in other processes attach to the measurement session as viewers.
+
+    Viewers connect over an authenticated local socket. Each one gets the same
+    batches of changes as the local UI and sends commands back, so serving
+    another device never starts a second copy of the automation stack.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.listener: Listener | None = None
+
+    def start(self, session) -> str:
+        """Start accepting viewers. The address and key are put in the environment
+        so the viewer processes started from this process can attach."""
+        if self.listener is not None:
+            return os.environ[config.ENGINE_ADDRESS_ENV]
+
+        self.session = session
+        authkey = secrets.token_bytes(16)
+        self.listener = Listener((config.ENGINE_HOST, 0), authkey=authkey)
+        host, port = self.listener.address
+        os.environ[config.ENGINE_ADDRESS_ENV] = f"{host}:{port}"
+        os.environ[config.ENGINE_KEY_ENV] = authkey.hex()
+
+        threading.Thread(target=self._accept, name="engine-host", daemon=True).start()
+        return os.environ[config.ENGINE_ADDRESS_ENV]
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return  # The listener was closed
+            threading.Thread(
+                target=self._serve_viewer,
+                args=(connection,),
+                name="engine-viewer",
+                daemon=True,
+            ).start()
+
+    def _serve_viewer(self, connection: Connection):
+        viewer = self.session.attach()
+        try:
+            while True:
+                # Commands are answered right away, changes are sent once per frame
+                if connection.poll(config.MESSAGE_DRAIN_INTERVAL):
+                    command, args = connection.recv()
+                    self.session.handle(command, *args)
+                for batch in viewer.take_batches():
+                    connection.send(batch)
+        except (EOFError, OSError):
+            pass  # The viewer was closed
+        finally:
+            viewer.close()
+            connection.close()
+
+
+engine_host = EngineHost()
+
+
+class RemoteViewer:
+    """A viewer in another process, attached to the session through the engine host."""
+
+    def __init__(self, address: str, authkey: bytes):
+        host, port = address.rsplit(":", 1)
+        self._connection = Client((host, int(port)), authkey=authkey)
+        self._batches = deque()
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._receive, name="viewer", daemon=True).start()
+
+    @classmethod
+    def from_environment(cls) -> "RemoteViewer":
+        """Attach to the engine host that started this process."""
+        address = os.environ.get(config.ENGINE_ADDRESS_ENV)
+        key = os.environ.get(config.ENGINE_KEY_ENV)
+        if not address or not key:
+            raise ConnectionError("No measurement engine to attach to")
+        return cls(address, bytes.fromhex(key))
+
+    def _receive(self):
+        try:
+            while True:
+                self._batches.append(self._connection.recv())
+        except (EOFError, OSError):
+            self._batches.append(
+                {
+                    "messages": [
+                        format_message(
+                            {
+                                "time": time.time(),
+                                "message": f"{config.PRINTFORMAT['ERROR']} Lost the connection to the measurement engine",
+                            }
+                        )
+                    ]
+                }
+            )
+
+    def take_batches(self) -> list:
+        """Return the batches of changes received since the last call."""
+        batches = []
+        while self._batches:
+            batches.append(self._batches.popleft())
+        return batches
+
+    def send(self, command: str, *args):
+        """Send a command such as start, pause, stop, answer or configure to the session."""
+        with self._send_lock:
+            try:
+                self._connection.send((command, args))
+            except OSError:
+                pass  # Reported by the receiving thread
+
+    def close(self):
+        self._connection.close()
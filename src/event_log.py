@@ -0,0 +1,162 @@
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from config import CONSOLE_MAX_LINES, EVENT_LOG_FILE, EVENT_LOG_MAX_BYTES, PRINTFORMAT
+
+
+class EventLog:
+    """Structured JSONL record of the session, written to disk by a background thread.
+
+    Events carrying a message are also kept in a bounded buffer that the UI
+    console drains, so the console holds only the latest lines while the full
+    history stays on disk and can be read back on demand. Events in
+    CONSOLE_EVENTS carry plain fields and are formatted for the console when shown.
+    Once the file reaches max_bytes it is moved to path + ".1", replacing the
+    previous one, so a long session can't fill the disk.
+    """
+
+    def __init__(
+        self,
+        path: str = EVENT_LOG_FILE,
+        max_lines: int = CONSOLE_MAX_LINES,
+        max_bytes: int = EVENT_LOG_MAX_BYTES,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._queue: queue.Queue = queue.Queue()
+        self._messages: deque = deque(maxlen=max_lines)  # Lines not yet shown
+        self._writer: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, message: str | None = None, **fields):
+        """Record an event. Never blocks on disk."""
+        record = {"time": time.time(), "event": event, **fields}
+        if message is not None:
+            record["message"] = message
+        if message is not None or event in CONSOLE_EVENTS:
+            self._messages.append(record)
+        self._start_writer()
+        self._queue.put(record)
+
+    def take_messages(self) -> list[str]:
+        """Return the console lines of the events emitted since the last call."""
+        lines = []
+        while self._messages:
+            lines.append(format_message(self._messages.popleft()))
+        return lines
+
+    def read_messages(self, limit: int | None = None) -> list[str]:
+        """Read the console lines of earlier events back from disk.
+
+        With a limit only the end of the file is read, however long the session.
+        """
+        self.flush()
+        lines = []
+        try:
+            with open(self.path, "rb") as f:
+                for line in read_lines_backwards(f) if limit else f:
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    if isinstance(record, dict) and is_console_event(record):
+                        lines.append(format_message(record))
+                        if limit and len(lines) >= limit:
+                            break
+        except FileNotFoundError:
+            return []
+        return lines[::-1] if limit else lines
+
+    def flush(self):
+        """Block until every emitted event has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_events, name="event-log", daemon=True
+                )
+                self._writer.start()
+
+    def _write_events(self):
+        while True:
+            records = [self._queue.get()]
+            # Write everything that piled up while the last batch was written
+            while not self._queue.empty():
+                records.append(self._queue.get_nowait())
+            try:
+                self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    # Fields JSON can't encode are written as text
+                    f.writelines(
+                        json.dumps(record, default=str) + "\n" for record in records
+                    )
+            except Exception:
+                pass  # Losing the log must never stop a measurement or the writer
+            finally:
+                # flush() waits for these, so they are marked done whatever happened
+                for _ in records:
+                    self._queue.task_done()
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            pass
+
+
+def read_lines_backwards(f, block_size: int = 65536):
+    """Yield the lines of a file opened in binary mode, last line first."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    rest = b""
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + rest).split(b"\n")
+        rest = lines.pop(0)  # May continue in the previous block
+        yield from reversed(lines)
+    yield rest
+
+
+def format_rew_error(record: dict) -> str:
+    from rich.markup import escape
+
+    return f"{PRINTFORMAT['ERROR']} REW API error while {record.get('operation')}: {escape(str(record.get('error')))}"
+
+
+# Events without a message that are shown on the console, with their formatter
+CONSOLE_EVENTS = {"rew_error": format_rew_error}
+
+
+def is_console_event(record: dict) -> bool:
+    return "message" in record or record.get("event") in CONSOLE_EVENTS
+
+
+def format_message(record: dict) -> str:
+    """Get the console line of an event."""
+    timestamp = datetime.datetime.fromtimestamp(record["time"]).strftime("%H:%M:%S")
+    if "message" in record:
+        return f"[{timestamp}] {record['message']}"
+    return f"[{timestamp}] {CONSOLE_EVENTS[record['event']](record)}"
+
+
+def to_plain(markup: str) -> str:
+    """Strip console markup from a line, for output that isn't a terminal."""
+    from rich.text import Text
+
+    return Text.from_markup(markup).plain
+
+
+event_log = EventLog()
@@ -1,38 +1,139 @@
-import time
-from utils import get_correct_path, check_control_events
+from utils import CancelToken
 import config
-from threading import Event
+import time
 
 import pyautogui
 
-from audio import play_sweep
+from measurement_driver import play_sweep_and_wait, prompt_subwoofer_cable
+from pacing import ActionPacer
+from template_matcher import TemplateMatcher
 
 pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.5
+pyautogui.PAUSE = config.PACING_MIN_PAUSE
+
+
+class ButtonLocator:
+    """Finds buttons on screen, remembering where each one was last seen.
+
+    A small region around the last hit is searched first, which is much cheaper
+    than a full-screen search. The full screen is only searched when that fails.
+    """
+
+    def __init__(self, margin: int = config.LOCATOR_REGION_MARGIN):
+        self.margin = margin
+        self.matcher = TemplateMatcher()
+        self.last_boxes: dict = {}
+        self.stats = {"hits": 0, "misses": 0, "full_searches": 0}
+
+    def locate(self, image_name: str, region_only: bool = False):
+        """Return the center of the button, raising pyautogui.ImageNotFoundException if it is not on screen.
+
+        With region_only, a button that has been found before is only looked for at its last position.
+        """
+        last_box = self.last_boxes.get(image_name)
+        if last_box is not None:
+            box = self.matcher.match(image_name, self._region_around(last_box))
+            if box is not None:
+                self.stats["hits"] += 1
+                self.last_boxes[image_name] = box
+                return pyautogui.center(box)
+            self.stats["misses"] += 1
+            if region_only:
+                raise pyautogui.ImageNotFoundException(f"Could not locate {image_name}")
+
+        self.stats["full_searches"] += 1
+        box = self.matcher.match(image_name)
+        if box is None:
+            self.last_boxes.pop(image_name, None)
+            raise pyautogui.ImageNotFoundException(f"Could not locate {image_name}")
+        self.last_boxes[image_name] = box
+        return pyautogui.center(box)
+
+    def _region_around(self, box) -> tuple:
+        screen_width, screen_height = pyautogui.size()
+        left = max(0, box.left - self.margin)
+        top = max(0, box.top - self.margin)
+        width = min(screen_width - left, box.width + 2 * self.margin)
+        height = min(screen_height - top, box.height + 2 * self.margin)
+        return left, top, width, height
+
+    def is_visible(self, image_name: str, region_only: bool = False) -> bool:
+        """Return True if the button is currently on screen."""
+        try:
+            self.locate(image_name, region_only)
+            return True
+        except pyautogui.ImageNotFoundException:
+            return False
+
+    def get_scale(self, image_name: str) -> float:
+        """Return the display scale the button was last found at."""
+        last_box = self.last_boxes.get(image_name)
+        return last_box.scale if last_box is not None else 1.0
 
 
-def get_button_position(
-    image_name, message_ui, pause_event: Event, stop_event: Event
-) -> tuple:
+button_locator = ButtonLocator()
+action_pacer = ActionPacer()
+
+
+def get_button_position(image_name, message_ui, cancel_token: CancelToken) -> tuple:
     """Get the position of a button on screen using Pyautogui."""
-    image_path = get_correct_path(image_name, "assets")
 
     while True:
-        if check_control_events(pause_event, stop_event, message_ui):
+        if cancel_token.check():
             break
         try:
             # Locate the image on screen
-            location = pyautogui.locateCenterOnScreen(image_path, confidence=0.9)
+            location = button_locator.locate(image_name)
             return location
         except pyautogui.ImageNotFoundException:
             message_ui.input(
                 f"Could not find {image_name} on screen. Please move the window to the correct position and press OK."
             )
-            pause_event.wait()
-
-
-def get_relative_position(reference, offset):
-    return reference[0] + offset[0], reference[1] + offset[1]
+            cancel_token.wait_while_paused()
+
+
+def get_relative_position(reference, offset, scale: float = 1.0):
+    return reference[0] + round(offset[0] * scale), reference[1] + round(offset[1] * scale)
+
+
+def is_rew_main_window_active() -> bool:
+    """Return True when REW's main window has focus and no dialog is open over it."""
+    # Only available on Windows, elsewhere the buttons alone decide
+    get_active_window_title = getattr(pyautogui, "getActiveWindowTitle", None)
+    if get_active_window_title is not None:
+        title = get_active_window_title() or ""
+        if not title.startswith(config.REW_MAIN_WINDOW_TITLE):
+            return False  # A warning or another dialog has focus
+    measure_dialog_open = button_locator.is_visible("StartButton.png")
+    return not measure_dialog_open and button_locator.is_visible("MeasureButton.png")
+
+
+def close_dialogs(cancel_token: CancelToken):
+    """Press Enter until REW is back at its main window, including popups such as clipping warnings."""
+    for _ in range(config.DIALOG_CLOSE_ATTEMPTS):
+        pyautogui.press("enter")
+        if action_pacer.wait_until(
+            "close dialogs", is_rew_main_window_active, cancel_token, timeout=1.0
+        ):
+            # Warnings can open right after the dialog closes, so check once more
+            time.sleep(config.DIALOG_SETTLE_TIME)
+            if is_rew_main_window_active():
+                return True
+    return False
+
+
+def close_measure_dialog():
+    """Cancel a measurement by closing REW's Measure dialog with Escape."""
+    for _ in range(config.DIALOG_CLOSE_ATTEMPTS):
+        if not button_locator.is_visible("StartButton.png"):
+            return
+        pyautogui.press("escape")
+        # No cancel token: the dialog must close even when the schedule was stopped
+        action_pacer.wait_until(
+            "cancel measure dialog",
+            lambda: not button_locator.is_visible("StartButton.png", region_only=True),
+            timeout=1.0,
+        )
 
 
 def run_sweep(
@@ -41,71 +142,79 @@ def run_sweep(
     position,
     audio_file,
     message_ui,
-    pause_event: Event,
-    stop_event: Event,
+    cancel_token: CancelToken,
 ):
-    """Automate measurement process using Pyautogui."""
+    """Automate measurement process using Pyautogui.
+
+    Returns True if the sweep was played to the end, False if it was stopped or interrupted.
+    """
 
-    # Check for control events and return if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
+    # Check for control events and return if a stop was requested.
+    if cancel_token.check():
+        return False
 
     # Get positions
     measure_button_rew = get_button_position(
-        "MeasureButton.png", message_ui, pause_event, stop_event
+        "MeasureButton.png", message_ui, cancel_token
     )
-    # Check for control events and return if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
+    # Check for control events and return if a stop was requested.
+    if cancel_token.check():
+        return False
 
     pyautogui.click(*measure_button_rew, clicks=2)
-
-    start_button_rew = get_button_position(
-        "StartButton.png", message_ui, pause_event, stop_event
+    action_pacer.wait_until(
+        "open measure dialog",
+        lambda: button_locator.is_visible("StartButton.png"),
+        cancel_token,
     )
 
-    # Check for control events and return if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
+    start_button_rew = get_button_position("StartButton.png", message_ui, cancel_token)
 
-    name_textbox_rew = get_relative_position(start_button_rew, config.REW_NAME_OFFSET)
-    notes_textbox_rew = get_relative_position(start_button_rew, config.REW_NOTES_OFFSET)
+    # Check for control events and return if a stop was requested.
+    if cancel_token.check():
+        close_measure_dialog()
+        return False
 
-    pyautogui.click(*name_textbox_rew, clicks=2)
-    measurement_name = (
-        f"{channel}"
-        if config.measure_reference
-        else f"{channel} (Pos: {position} - Iter: {iteration})"
+    # The offset was measured at 100 % display scaling
+    notes_textbox_rew = get_relative_position(
+        start_button_rew,
+        config.REW_NOTES_OFFSET,
+        button_locator.get_scale("StartButton.png"),
     )
-    pyautogui.typewrite(measurement_name)
-    pyautogui.click(*notes_textbox_rew)
 
-    # Pause if the channel is SW2, SW3, or SW4
-    if channel is audio_file and channel in {"SW2", "SW3", "SW4"}:
-        # Use message_ui to inform the user to switch cables
-        message_ui.input(
-            f"Please plug your {channel} into SW1 and press Enter to continue..."
+    # The measurement is named and annotated through the API once it has been taken
+    prompt_subwoofer_cable(channel, audio_file, message_ui, cancel_token)
+
+    # Check for control events and return if a stop was requested.
+    if cancel_token.check():
+        close_measure_dialog()
+        return False
+
+    def start_measurement() -> bool:
+        pyautogui.click(*start_button_rew)
+        return True
+
+    if not play_sweep_and_wait(
+        channel,
+        iteration,
+        position,
+        audio_file,
+        start_measurement,
+        message_ui,
+        cancel_token,
+        cancel_measurement=close_measure_dialog,
+    ):
+        return False
+
+    # Check for control events and return if a stop was requested.
+    if cancel_token.check():
+        return False
+
+    # Clicking OK to get rid of dialog boxes until REW is back at the main window
+    pyautogui.click(*notes_textbox_rew)
+    if not close_dialogs(cancel_token):
+        message_ui.info(
+            f"{config.PRINTFORMAT['WARNING']} REW still shows a dialog after {config.DIALOG_CLOSE_ATTEMPTS} attempts to close it"
         )
-        # Pause until the user is ready to measure
-        pause_event.clear()
-        pause_event.wait()
-
-    # Check for control events and return if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
-    message_ui.info(
-        f"{config.PRINTFORMAT['INFO']} Playing sweep for {channel} (Position: {position} - Iteration: {iteration})"
-    )
-    pyautogui.click(*start_button_rew)
-    play_sweep(f"{'SWx' if audio_file.startswith('SW') else audio_file}")
-    time.sleep(2)  # Wait for measurement to complete
 
-    # Check for control events and return if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
-
-    # Clicking OK to get rid of dialog boxes
-    pyautogui.click(*notes_textbox_rew)
-    pyautogui.press("enter")
-    pyautogui.press("enter")
-    pyautogui.press("enter")
+    return True
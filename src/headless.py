@@ -0,0 +1,241 @@
+import argparse
+import json
+import sys
+import time
+
+import config
+from event_log import to_plain
+from session import SessionState, get_session, validate_schedule_settings
+from schedule import StepStatus
+from utils import load_settings
+
+ANSWERS = {"proceed": True, "abort": False}
+
+
+def parse_arguments(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="AutomatedSweeps --headless",
+        description="Run the measurement schedule without the UI and print progress as JSON lines.",
+    )
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--debug", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--settings",
+        default=config.SETTINGS_FILE,
+        help="Channel settings saved from the UI (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--position", default=config.measure_position_name, help="Position name"
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=config.measure_iterations,
+        help="Sweeps per channel",
+    )
+    parser.add_argument(
+        "--reference",
+        action=argparse.BooleanOptionalAction,
+        default=config.measure_reference,
+        help="Name the first iteration Reference",
+    )
+    parser.add_argument(
+        "--mic-position",
+        action=argparse.BooleanOptionalAction,
+        default=config.measure_mic_position,
+        help="Measure distances and check the microphone position first",
+    )
+    parser.add_argument(
+        "--answer",
+        choices=("ask", "proceed", "abort"),
+        default="ask",
+        help="How to answer prompts: ask on stdin, or always proceed or abort (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--policy",
+        help='JSON file mapping prompt text to answers, e.g. {"answers": {"REW API is not running": "abort"}, "default": "proceed"}',
+    )
+    parser.add_argument(
+        "--max-prompts",
+        type=int,
+        default=10,
+        help="Abort a run after this many prompts (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Run the schedule this many times"
+    )
+    parser.add_argument(
+        "--emulator",
+        action="store_true",
+        help="Measure against the built-in REW emulator with silent playback",
+    )
+    from rew_emulator import add_emulator_arguments
+
+    add_emulator_arguments(parser, prefix="emulator-")
+    return parser.parse_args(argv)
+
+
+def emit(event: str, **fields):
+    """Print one progress record as a JSON line."""
+    print(json.dumps({"time": time.time(), "event": event, **fields}), flush=True)
+
+
+class PromptPolicy:
+    """Answers the prompts of the workflow from a policy file, a fixed answer or stdin."""
+
+    def __init__(self, answer: str, path: str | None, max_prompts: int):
+        self.answers: dict = {}
+        self.default = answer
+        self.max_prompts = max_prompts
+        self.prompts = 0
+        if path:
+            with open(path, "r") as f:
+                policy = json.load(f)
+            self.answers = policy.get("answers", {})
+            self.default = policy.get("default", self.default)
+        for answer in [self.default, *self.answers.values()]:
+            if answer not in ("ask", *ANSWERS):
+                raise ValueError(
+                    f"Unknown answer {answer!r}, use ask, proceed or abort"
+                )
+
+    def decide(self, prompt: str) -> bool:
+        """Return True to proceed or False to abort the run."""
+        self.prompts += 1
+        if self.prompts > self.max_prompts:
+            emit("prompt_limit", prompts=self.prompts - 1)
+            return False
+
+        answer = next(
+            (answer for text, answer in self.answers.items() if text in prompt),
+            self.default,
+        )
+        if answer == "ask":
+            emit("prompt", prompt=prompt, answer="ask")
+            line = sys.stdin.readline().strip().lower()
+            return line in ("y", "yes", "ok", "proceed")
+        emit("prompt", prompt=prompt, answer=answer)
+        return ANSWERS[answer]
+
+
+def get_settings(arguments: argparse.Namespace) -> dict:
+    """Build the schedule settings from the settings file and the options.
+
+    Raises ValueError when the file is missing or the settings are invalid.
+    """
+    channels = load_settings(arguments.settings)
+    if not isinstance(channels, dict) or not channels:
+        raise ValueError(f"No channel settings in {arguments.settings}")
+
+    return validate_schedule_settings(
+        {
+            "channels": {
+                channel: (
+                    {"audio": mapping.get("audio")}
+                    if isinstance(mapping, dict)
+                    else mapping
+                )
+                for channel, mapping in channels.items()
+            },
+            "iterations": arguments.iterations,
+            "mic_position": arguments.mic_position,
+            "reference": arguments.reference,
+            "position_name": arguments.position,
+        }
+    )
+
+
+def start_emulator(arguments: argparse.Namespace):
+    """Point the app at a REW emulator on a free port, without audio or the GUI driver."""
+    from rew_emulator import create_emulator
+
+    emulator = create_emulator(arguments, port=0, prefix="emulator-")
+    # Must happen before rew_api is imported, its client keeps the base URL
+    config.BASE_URL_ENDPOINT = emulator.start()
+    config.PLAYBACK_ENGINE = "silent"
+    config.SILENT_SWEEP_DURATION = emulator.sweep_duration
+    config.MEASUREMENT_DRIVER = "api"
+    emit("emulator", url=config.BASE_URL_ENDPOINT)
+
+
+def run_schedule(session, viewer, policy: PromptPolicy, run: int) -> bool:
+    """Run the schedule once and report progress. Returns True when it completed."""
+    started = time.perf_counter()
+    policy.prompts = 0
+    config.measurement_schedule.reset_status()
+    session.start()
+
+    running = True
+    while running:
+        time.sleep(config.MESSAGE_DRAIN_INTERVAL)
+        for batch in viewer.take_batches():
+            for line in batch.get("messages", []):
+                emit("message", message=to_plain(line))
+            for index in batch.get("rows", {}):
+                step = config.measurement_schedule[index]
+                emit(
+                    "step",
+                    index=index,
+                    description=step.description,
+                    channel=step.channel,
+                    iteration=step.iteration,
+                    status=step.status.value,
+                )
+            if batch.get("prompt"):
+                session.answer(policy.decide(batch["prompt"]))
+            if "state" in batch:
+                emit("state", state=batch["state"])
+                running = batch["state"] != SessionState.IDLE.value
+
+    # A stop resets the statuses, so only a completed run has every step completed
+    completed = all(
+        step.status is StepStatus.COMPLETED for step in config.measurement_schedule
+    )
+    emit(
+        "finished",
+        run=run,
+        completed=completed,
+        duration=time.perf_counter() - started,
+    )
+    return completed
+
+
+def run_headless(argv: list[str]) -> int:
+    """Run the measurement schedule without Textual. Returns the exit code."""
+    arguments = parse_arguments(argv)
+    try:
+        settings = get_settings(arguments)
+    except ValueError as e:
+        emit("error", message=str(e))
+        return 2
+
+    try:
+        policy = PromptPolicy(arguments.answer, arguments.policy, arguments.max_prompts)
+    except (OSError, ValueError) as e:
+        emit("error", message=f"Can't read the prompt policy: {e}")
+        return 2
+
+    if arguments.emulator:
+        start_emulator(arguments)
+
+    session = get_session()
+    viewer = session.attach()
+    session.configure(settings)
+    viewer.take_batches()  # The snapshot, progress starts with the first run
+    emit("schedule", steps=len(config.measurement_schedule), settings=settings)
+
+    completed_runs = 0
+    try:
+        for run in range(1, arguments.repeat + 1):
+            if run_schedule(session, viewer, policy, run):
+                completed_runs += 1
+            else:
+                break  # Stopped or aborted, don't start the next run
+    except KeyboardInterrupt:
+        session.stop()
+        emit("interrupted")
+        return 130
+    finally:
+        viewer.close()
+
+    return 0 if completed_runs == arguments.repeat else 1
@@ -1,12 +1,35 @@
-from ui import AutoSweepApp
-from serve import run_server
-import sys
+import time
+
+STARTED = time.time()  # Before any other import, for the startup benchmark
+
+import sys  # noqa: E402
+
+import config  # noqa: E402
 
 
 def main():
+    config.debug_logging = "--debug" in sys.argv
+
+    # Only the modules of the selected mode are imported here, the automation
+    # stack is loaded in the background once the UI has drawn its first frame
     if "--serve" in sys.argv:
-        run_server()
+        from serve import run_server
+
+        run_server(attach="--attach" in sys.argv)
+    elif "--headless" in sys.argv:
+        from headless import run_headless
+
+        sys.exit(run_headless(sys.argv[1:]))
+    elif "--benchmark-startup" in sys.argv:
+        from ui import AutoSweepApp
+
+        # Draw the first frame without a terminal and report when that happened
+        app = AutoSweepApp()
+        app.run(headless=True)
+        print(f"startup main={STARTED} first_frame={app.first_frame_time}")
     else:
+        from ui import AutoSweepApp
+
         app = AutoSweepApp()
         app.run()
 
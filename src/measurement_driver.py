@@ -0,0 +1,260 @@
+import datetime
+import json
+from abc import ABC, abstractmethod
+
+import config
+from event_log import event_log
+from rew_api import get_measure_commands, send_measure_command, update_measurement
+from pipeline import sweep_pipeline
+from sweep_watcher import SweepWatcher
+from utils import CancelToken
+
+
+def get_measurement_name(channel, iteration, position) -> str:
+    """Get the name a measurement is saved under in REW."""
+    return (
+        f"{channel}"
+        if config.measure_reference
+        else f"{channel} (Pos: {position} - Iter: {iteration})"
+    )
+
+
+def annotate_measurement(
+    uuid: str, channel, iteration, position, audio_file, step_id=None
+) -> bool:
+    """Name the measurement and store its metadata as JSON in the measurement notes."""
+    metadata = {
+        "channel": channel,
+        "audio_file": audio_file,
+        "position": position,
+        "iteration": iteration,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "step_id": step_id,
+    }
+    return update_measurement(
+        uuid,
+        title=get_measurement_name(channel, iteration, position),
+        notes=json.dumps(metadata),
+    )
+
+
+def prompt_subwoofer_cable(channel, audio_file, message_ui, cancel_token: CancelToken):
+    """Ask the user to move the cable when SW2, SW3 or SW4 is measured through SW1."""
+    if channel is audio_file and channel in {"SW2", "SW3", "SW4"}:
+        # Use message_ui to inform the user to switch cables
+        message_ui.input(
+            f"Please plug your {channel} into SW1 and press Enter to continue..."
+        )
+        # Pause until the user is ready to measure
+        cancel_token.wait_while_paused()
+
+
+def play_sweep_and_wait(
+    channel,
+    iteration,
+    position,
+    audio_file,
+    start_measurement,
+    message_ui,
+    cancel_token: CancelToken,
+    cancel_measurement=None,
+) -> bool:
+    """Start the measurement in REW, play the sweep and wait until REW has the result.
+
+    Any verification of the previous sweep still running in the background is
+    finished first, so problems REW logs are attributed to the right sweep.
+    When the sweep is interrupted, the measurement is cancelled in REW and any
+    measurement added since the sweep started is deleted, so a retry starts clean.
+
+    Args:
+        start_measurement (callable): Starts the measurement in REW. Returns False if REW
+            rejected it, in which case the user is asked to check REW and no sweep is played.
+        cancel_measurement (callable): Stops a measurement REW is still capturing.
+
+    Returns True if the sweep was played to the end, False if it was interrupted
+    or never started.
+    """
+    message_ui.info(
+        f"{config.PRINTFORMAT['INFO']} Playing sweep for {channel} (Position: {position} - Iteration: {iteration})"
+    )
+    audio_channel = "SWx" if audio_file.startswith("SW") else audio_file
+    if not sweep_pipeline.wait(cancel_token):
+        return False  # Stopped before the previous sweep was verified
+    sweep_watcher = SweepWatcher(cancel_token)
+    sweep_watcher.start()
+    if not start_measurement():
+        # Don't play a sweep REW won't record and then wait SWEEP_TIMEOUT for it
+        message_ui.info(
+            f"{config.PRINTFORMAT['ERROR']} REW did not start the measurement for {channel}"
+        )
+        message_ui.input(
+            "REW did not start the measurement. Check REW and press OK to try again."
+        )
+        cancel_token.wait_while_paused()
+        return False
+    from audio import get_playback_engine
+
+    playback_engine = get_playback_engine()
+    playback_engine.play(audio_channel)
+
+    # Wait for playback to end and REW to list the new measurement
+    timings = sweep_watcher.wait(playback_engine.is_playing)
+    event_log.emit(
+        "sweep",
+        channel=channel,
+        iteration=iteration,
+        position=position,
+        audio=audio_channel,
+        **timings,
+    )
+    if timings["interrupted"]:
+        # Stop or pause requested mid-sweep: silence the speakers right away
+        playback_engine.stop()
+        if cancel_measurement is not None:
+            cancel_measurement()
+        sweep_watcher.discard()
+        message_ui.info(
+            f"{config.PRINTFORMAT['WARNING']} Sweep for {channel} interrupted after {timings['total']:.1f} s"
+        )
+        return False
+    playback_engine.check_playback_errors(audio_channel)
+    message_ui.info(
+        f"{config.PRINTFORMAT['INFO']} Sweep finished in {timings['total']:.1f} s (startup: {timings['startup']:.1f} s, playback: {timings['playback']:.1f} s, measurement: {timings['measurement']:.1f} s)"
+    )
+    if timings["timed_out"]:
+        message_ui.info(
+            f"{config.PRINTFORMAT['WARNING']} REW did not report a new measurement within {config.SWEEP_TIMEOUT:.0f} s"
+        )
+    return True
+
+
+class MeasurementDriver(ABC):
+    """A way of taking a sweep measurement in REW."""
+
+    name = ""
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Return True if this driver can be used with the running REW."""
+
+    def check_ready(self, message_ui, cancel_token: CancelToken):
+        """Make sure REW is ready to take measurements, prompting the user if needed."""
+
+    @abstractmethod
+    def run_sweep(
+        self,
+        channel,
+        iteration,
+        position,
+        audio_file,
+        message_ui,
+        cancel_token,
+    ) -> bool:
+        """Take one sweep. Returns True if it was played to the end."""
+
+
+class GuiMeasurementDriver(MeasurementDriver):
+    """Takes measurements by automating REW's Measure dialog with pyautogui."""
+
+    name = "gui"
+
+    def is_available(self) -> bool:
+        return True
+
+    def check_ready(self, message_ui, cancel_token: CancelToken):
+        # Checking if measure button is visible. This already contains a loop to inform user move window if necessary.
+        from gui_automation import get_button_position
+
+        message_ui.info(
+            f"{config.PRINTFORMAT['INFO']} Checking if measure button is visible"
+        )
+        get_button_position("MeasureButton.png", message_ui, cancel_token)
+
+    def run_sweep(
+        self,
+        channel,
+        iteration,
+        position,
+        audio_file,
+        message_ui,
+        cancel_token,
+    ) -> bool:
+        from gui_automation import run_sweep
+
+        return run_sweep(
+            channel, iteration, position, audio_file, message_ui, cancel_token
+        )
+
+
+class ApiMeasurementDriver(MeasurementDriver):
+    """Takes measurements through REW's measure command, without touching the screen."""
+
+    name = "api"
+
+    def __init__(self):
+        self.commands: list = []
+
+    def is_available(self) -> bool:
+        self.commands = get_measure_commands()
+        return config.MEASURE_SWEEP_COMMAND in self.commands
+
+    def run_sweep(
+        self,
+        channel,
+        iteration,
+        position,
+        audio_file,
+        message_ui,
+        cancel_token,
+    ) -> bool:
+        # Check for control events and return if a stop was requested.
+        if cancel_token.check():
+            return False
+
+        prompt_subwoofer_cable(channel, audio_file, message_ui, cancel_token)
+
+        # Check for control events and return if a stop was requested.
+        if cancel_token.check():
+            return False
+
+        return play_sweep_and_wait(
+            channel,
+            iteration,
+            position,
+            audio_file,
+            lambda: send_measure_command(config.MEASURE_SWEEP_COMMAND),
+            message_ui,
+            cancel_token,
+            cancel_measurement=self.cancel_measurement,
+        )
+
+    def cancel_measurement(self):
+        if config.MEASURE_CANCEL_COMMAND in self.commands:
+            send_measure_command(config.MEASURE_CANCEL_COMMAND)
+
+
+MEASUREMENT_DRIVERS = {
+    ApiMeasurementDriver.name: ApiMeasurementDriver,
+    GuiMeasurementDriver.name: GuiMeasurementDriver,
+}
+
+_measurement_driver: MeasurementDriver | None = None
+
+
+def get_measurement_driver(probe: bool = False) -> MeasurementDriver:
+    """Return the driver selected by config.MEASUREMENT_DRIVER, probing REW for "auto".
+
+    The choice is kept until a call with probe, which every schedule makes when it
+    starts, so a REW API that was down earlier doesn't pin the GUI driver.
+    """
+    global _measurement_driver
+    if _measurement_driver is None or probe:
+        if config.MEASUREMENT_DRIVER == "auto":
+            api_driver = ApiMeasurementDriver()
+            _measurement_driver = (
+                api_driver if api_driver.is_available() else GuiMeasurementDriver()
+            )
+        else:
+            _measurement_driver = MEASUREMENT_DRIVERS[config.MEASUREMENT_DRIVER]()
+            _measurement_driver.is_available()
+    return _measurement_driver
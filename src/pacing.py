@@ -0,0 +1,56 @@
+import time
+from collections import defaultdict
+
+import config
+from utils import CancelToken
+
+
+def default_action_stats():
+    return {"count": 0, "timeouts": 0, "total_time": 0.0, "max_time": 0.0}
+
+
+class ActionPacer:
+    """Waits after GUI actions only as long as the UI needs to react.
+
+    Instead of a fixed pause after every click, the pacer polls a condition that
+    confirms the transition (a dialog appeared or closed, a measurement was added)
+    and records how long each action actually had to wait.
+    """
+
+    def __init__(self, poll_interval: float = config.PACING_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.stats = defaultdict(default_action_stats)
+
+    def wait_until(
+        self,
+        action: str,
+        condition,
+        cancel_token: CancelToken | None = None,
+        timeout: float = config.PACING_TIMEOUT,
+    ) -> bool:
+        """Wait until condition() is True. Returns False on timeout or when interrupted."""
+        start = time.monotonic()
+        confirmed = condition()
+        while not confirmed and time.monotonic() - start < timeout:
+            if cancel_token is not None and cancel_token.sleep(self.poll_interval):
+                break
+            if cancel_token is None:
+                time.sleep(self.poll_interval)
+            confirmed = condition()
+        self.record(action, time.monotonic() - start, timed_out=not confirmed)
+        return confirmed
+
+    def record(self, action: str, elapsed: float, timed_out: bool = False):
+        stats = self.stats[action]
+        stats["count"] += 1
+        stats["timeouts"] += int(timed_out)
+        stats["total_time"] += elapsed
+        stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def get_stats(self) -> dict:
+        """Return the per-action counters with the average wait added."""
+        return {
+            action: {**stats, "avg_time": stats["total_time"] / stats["count"]}
+            for action, stats in self.stats.items()
+            if stats["count"]
+        }
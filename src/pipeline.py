@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
+
+from config import PRINTFORMAT, VERIFICATION_POLL_INTERVAL
+from event_log import event_log
+
+
+class VerificationPipeline:
+    """Verifies finished sweeps in the background while the next sweep is set up.
+
+    Verification jobs (problem checks, summary fetches, metadata tagging) run one
+    at a time on a worker thread. wait() is called right before the next sweep is
+    started in REW, so a job never overlaps with a sweep it could mistake for its
+    own. Steps whose verification failed are collected and handed back with
+    take_failed() so the workflow can re-queue them. The pipeline outlives a run,
+    so every run starts with reset() to finish and forget the jobs of the last one.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sweep-verification"
+        )
+        self._pending: list[tuple[int, Future]] = []
+        self._failed: list[int] = []
+        self._lock = threading.Lock()
+
+    def submit(self, step_index: int, verify, *args):
+        """Run verify(*args) in the background. It returns True if the step succeeded."""
+        future = self._executor.submit(verify, *args)
+        with self._lock:
+            self._pending.append((step_index, future))
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
+
+    def wait(self, cancel_token=None) -> bool:
+        """Block until every submitted verification has finished.
+
+        Returns False if cancel_token was stopped first. The verifications that were
+        still running stay pending, so a later wait() collects their results.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        while pending:
+            step_index, future = pending[0]
+            if cancel_token is not None:
+                while not future.done():
+                    if cancel_token.stopped:
+                        with self._lock:
+                            self._pending[:0] = pending
+                        return False
+                    wait_for_futures([future], timeout=VERIFICATION_POLL_INTERVAL)
+            pending.pop(0)
+            try:
+                verified = future.result()
+            except Exception as e:
+                event_log.emit(
+                    "verification_error",
+                    message=f"{PRINTFORMAT['ERROR']} Error verifying step {step_index + 1}: {e}",
+                    step=step_index + 1,
+                )
+                verified = False
+            if not verified:
+                with self._lock:
+                    self._failed.append(step_index)
+        return True
+
+    def take_failed(self) -> list[int]:
+        """Return the indexes of the steps that failed verification since the last call."""
+        with self._lock:
+            failed, self._failed = self._failed, []
+        return failed
+
+    def reset(self, cancel_token=None) -> bool:
+        """Finish the verifications of an earlier run and forget its failed steps.
+
+        Returns False if cancel_token was stopped before they finished.
+        """
+        finished = self.wait(cancel_token)
+        self.take_failed()
+        return finished
+
+
+sweep_pipeline = VerificationPipeline()
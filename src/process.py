@@ -1,216 +1,272 @@
-from gui_automation import run_sweep
+from measurement_driver import annotate_measurement, get_measurement_driver
+from pipeline import sweep_pipeline
 from rew_api import (
-    check_new_problems,
     delete_measurement,
-    get_selected_measurement_uuid,
+    get_measurement_summary,
+    measurement_index,
+    problem_tracker,
 )
-from utils import get_microphone_distance, check_control_events
+from schedule_engine import (
+    MAX_ATTEMPTS,
+    EngineState,
+    Outcome,
+    ScheduleEngine,
+    StepType,
+    Transition,
+    register_step_type,
+)
+from utils import CancelToken, get_microphone_distance
 import config
-from threading import Event
-from ui import MessageUI
-from gui_automation import get_button_position
+from event_log import event_log
+from session_journal import session_journal
 from rew_api import ensure_rew_api, ensure_rew_settings
 
 
-def run_workflow(message_ui: MessageUI, pause_event: Event, stop_event: Event):
-    total_steps = len(config.measurement_schedule)
-    current_step = 0
-    successful_step = False
-    uuids: dict = {}
+def run_workflow(message_ui, cancel_token: CancelToken):
+    """Runs the configured measurement schedule."""
+    engine = ScheduleEngine(config.measurement_schedule, message_ui, cancel_token)
+    engine.run()
 
-    while current_step < total_steps:
-        # Check for control events and break if stop_event is set.
-        if check_control_events(pause_event, stop_event, message_ui):
-            break
+    if engine.state is EngineState.COMPLETED:
+        # The session is complete, the next run starts from scratch
+        session_journal.clear()
+
+
+@register_step_type("Check REW settings")
+class CheckRewSettings(StepType):
+    def execute(self, engine: ScheduleEngine, index: int) -> Transition:
+        message_ui, cancel_token = engine.message_ui, engine.cancel_token
+
+        # Checking if REW API is running
+        message_ui.info(f"{config.PRINTFORMAT['INFO']} Checking if REW API is running")
+        while not ensure_rew_api():
+            # Check for control events and break if a stop was requested.
+            if cancel_token.check():
+                break
+            message_ui.input("REW API is not running. Please start REW and press OK.")
+            cancel_token.wait_while_paused()
+
+        # Checking if some of the REW settings are correct
+        message_ui.info(
+            f"{config.PRINTFORMAT['INFO']} Checking REW measurement settings"
+        )
+        while True:
+            # Check for control events and break if a stop was requested.
+            if cancel_token.check():
+                break
 
-        successful_step = False
+            errors = ensure_rew_settings()  # Get the list of errors
+            if not errors:
+                break  # Exit loop if settings are correct
 
+            # Show errors to the user
+            for error in errors:
+                message_ui.input(error)
+                cancel_token.wait_while_paused()
+
+            cancel_token.wait_while_paused()
+
+        # Load the measurements already in REW to resume earlier sessions,
+        # and ignore problems REW logged before this run
+        measurement_index.refresh()
+        problem_tracker.mark()
+
+        # Checking if REW is ready to take measurements with the selected driver
+        measurement_driver = get_measurement_driver(probe=True)
         message_ui.info(
-            f"{config.PRINTFORMAT['INFO']} Running step: {config.measurement_schedule[current_step]['Description']}"
+            f"{config.PRINTFORMAT['INFO']} Taking measurements through the REW {measurement_driver.name.upper()}"
         )
+        measurement_driver.check_ready(message_ui, cancel_token)
+
+        return Transition(Outcome.COMPLETED)
 
-        # Update the status of the current step
-        config.measurement_schedule[current_step]["Status"] = (
-            "[yellow]In progress[/yellow]"
+
+@register_step_type("Measure distance")
+class MeasureDistance(StepType):
+    def execute(self, engine: ScheduleEngine, index: int) -> Transition:
+        successful_step, new_uuids = sweep_and_check_problems(
+            index, engine.message_ui, engine.cancel_token, max_attempts=MAX_ATTEMPTS
         )
-        message_ui.update()
-
-        match config.measurement_schedule[current_step]["Description"]:
-            case "Check REW settings":
-                # Checking if REW API is running
-                message_ui.info(
-                    f"{config.PRINTFORMAT['INFO']} Checking if REW API is running"
-                )
-                while not ensure_rew_api():
-                    # Check for control events and break if stop_event is set.
-                    if check_control_events(pause_event, stop_event, message_ui):
-                        break
-                    message_ui.input(
-                        "REW API is not running. Please start REW and press OK."
-                    )
-                    pause_event.wait()
-
-                # Checking if some of the REW settings are correct
-                message_ui.info(
-                    f"{config.PRINTFORMAT['INFO']} Checking REW measurement settings"
-                )
-                while True:
-                    # Check for control events and break if stop_event is set.
-                    if check_control_events(pause_event, stop_event, message_ui):
-                        break
-
-                    errors = ensure_rew_settings()  # Get the list of errors
-                    if not errors:
-                        break  # Exit loop if settings are correct
-
-                    # Show errors to the user
-                    for error in errors:
-                        message_ui.input(error)
-                        pause_event.wait()
-
-                    pause_event.wait()
-                # Checking if measure button is visible. This already contains a loop to inform user move window if necessary.
-                message_ui.info(
-                    f"{config.PRINTFORMAT['INFO']} Checking if measure button is visible"
-                )
-                get_button_position(
-                    "MeasureButton.png", message_ui, pause_event, stop_event
-                )
-
-                successful_step = True
-
-            case "Measure distance":
-                successful_step = sweep_and_check_problems(
-                    config.measurement_schedule[current_step]["Channel"],
-                    config.measurement_schedule[current_step]["Iteration"],
-                    config.measurement_schedule[current_step]["Position"],
-                    config.measurement_schedule[current_step]["Audio played"],
-                    message_ui,
-                    pause_event,
-                    stop_event,
-                    max_attempts=3,
-                )
-                uuids[config.measurement_schedule[current_step]["Channel"]] = (
-                    get_selected_measurement_uuid()
-                )
-
-            case "Check microphone position":
-                # Get the distance needed to move the microphone
-                # A negative number means it needs to move to the right speaker, while a positive number means it needs to move to the left speaker.
-                fr_fl_distance = get_microphone_distance(uuids["FR"], uuids["FL"])
-                if abs(fr_fl_distance) < 4:
-                    message_ui.info(
-                        f"{config.PRINTFORMAT['OK']} The microphone is positioned correctly within the error margin of 3 cm. (Distance from center: {abs(fr_fl_distance)} cm)"
-                    )
-                    successful_step = True
-                else:
-                    message_ui.info(
-                        f"{config.PRINTFORMAT['WARNING']} The microphone is positioned coutside the error margin of 3 cm. (Distance from center: {abs(fr_fl_distance)} cm)"
-                    )
-                    if fr_fl_distance < 0:
-                        message_ui.input(
-                            f"Move the microphone {abs(fr_fl_distance)} cm ({round(abs(fr_fl_distance) / 2.54, 2)} in) to the right speaker"
-                        )
-                    else:
-                        message_ui.input(
-                            f"Move the microphone {abs(fr_fl_distance)} cm ({round(abs(fr_fl_distance) / 2.54, 2)} in) to the left speaker"
-                        )
-                    pause_event.wait()
-                    current_step -= 2
-            case "Measure sweep":
-                successful_step = sweep_and_check_problems(
-                    config.measurement_schedule[current_step]["Channel"],
-                    config.measurement_schedule[current_step]["Iteration"],
-                    config.measurement_schedule[current_step]["Position"],
-                    config.measurement_schedule[current_step]["Audio played"],
-                    message_ui,
-                    pause_event,
-                    stop_event,
-                    max_attempts=3,
-                )
-        # Check for control events and break if stop_event is set.
-        if check_control_events(pause_event, stop_event, message_ui):
-            break
+        if not successful_step:
+            return Transition(Outcome.RETRY)
+
+        # Remember the measurement for the microphone position check
+        engine.context.setdefault("uuids", {})[
+            engine.schedule[index].channel
+        ] = next(iter(new_uuids))
+        return Transition(Outcome.COMPLETED)
+
 
-        if successful_step:
-            config.measurement_schedule[current_step]["Status"] = (
-                "[green]Completed[/green]"
+@register_step_type("Check microphone position")
+class CheckMicrophonePosition(StepType):
+    def execute(self, engine: ScheduleEngine, index: int) -> Transition:
+        message_ui = engine.message_ui
+        uuids = engine.context["uuids"]
+
+        # Get the distance needed to move the microphone
+        # A negative number means it needs to move to the right speaker, while a positive number means it needs to move to the left speaker.
+        fr_fl_distance = get_microphone_distance(uuids["FR"], uuids["FL"])
+        if abs(fr_fl_distance) < 4:
+            message_ui.info(
+                f"{config.PRINTFORMAT['OK']} The microphone is positioned correctly within the error margin of 3 cm. (Distance from center: {abs(fr_fl_distance)} cm)"
+            )
+            return Transition(Outcome.COMPLETED)
+
+        message_ui.info(
+            f"{config.PRINTFORMAT['WARNING']} The microphone is positioned coutside the error margin of 3 cm. (Distance from center: {abs(fr_fl_distance)} cm)"
+        )
+        if fr_fl_distance < 0:
+            message_ui.input(
+                f"Move the microphone {abs(fr_fl_distance)} cm ({round(abs(fr_fl_distance) / 2.54, 2)} in) to the right speaker"
             )
-            message_ui.update()
-            current_step += 1
         else:
-            config.measurement_schedule[current_step]["Status"] = (
-                "[yellow]Retrying[/yellow]"
+            message_ui.input(
+                f"Move the microphone {abs(fr_fl_distance)} cm ({round(abs(fr_fl_distance) / 2.54, 2)} in) to the left speaker"
             )
-            message_ui.update()
-    # Check for control events and break if stop_event is set.
-    if check_control_events(pause_event, stop_event, message_ui):
-        return
-    message_ui.complete()
+        engine.cancel_token.wait_while_paused()
 
+        # Measure FL and FR again before checking again
+        return Transition(Outcome.RETRY, retry_from=index - 2)
 
-def sweep_and_check_problems(
-    channel: str,
-    iteration,
-    position,
-    audio_file,
-    message_ui: MessageUI,
-    pause_event: Event,
-    stop_event: Event,
-    max_attempts=3,
-):
-    """Runs sweep and checks for new problems, retrying up to max_attempts times."""
 
-    # Track initial problem times
-    initial_problem_times = set()
-    previous_problem_times, _ = check_new_problems(initial_problem_times)
+@register_step_type("Measure sweep")
+class MeasureSweep(StepType):
+    def execute(self, engine: ScheduleEngine, index: int) -> Transition:
+        # Skip steps completed in an earlier run whose measurements are still in REW
+        if session_journal.is_completed(engine.schedule[index], measurement_index.uuids()):
+            engine.message_ui.info(
+                f"{config.PRINTFORMAT['OK']} Already measured in an earlier run. Skipping step."
+            )
+            return Transition(Outcome.COMPLETED)
 
-    attempts = 0
+        measurement_index.mark()
 
-    while attempts < max_attempts:
-        # Check for control events and break if stop_event is set.
-        if check_control_events(pause_event, stop_event, message_ui):
-            break
+        if not run_step_sweep(index, engine.message_ui, engine.cancel_token):
+            # The sweep was paused midway. Ignore whatever it left behind.
+            # After a stop the next run marks the problems again, so don't delay it.
+            if not engine.cancel_token.stopped:
+                engine.pipeline.wait(engine.cancel_token)
+                problem_tracker.mark()
+            return Transition(Outcome.RETRY)
 
-        run_sweep(
-            channel,
-            iteration,
-            position,
-            audio_file,
-            message_ui,
-            pause_event,
-            stop_event,
-        )
-        attempts += 1
+        # The sweep is verified in the background while the next step is set up
+        engine.submit_verification(index, measurement_index.take_added())
+        return Transition(Outcome.VERIFYING)
+
+    def verify(self, engine: ScheduleEngine, index: int, new_uuids: set) -> bool:
+        """Problem check, tagging, summaries and journal for a finished sweep."""
+        if not check_sweep(new_uuids, engine.message_ui):
+            return False
+
+        annotate_sweep(index, new_uuids)
+        session_journal.record(engine.schedule[index], new_uuids)
+        return True
 
-        # Check for control events and break if stop_event is set.
-        if check_control_events(pause_event, stop_event, message_ui):
-            break
 
+def run_step_sweep(step_index: int, message_ui, cancel_token) -> bool:
+    """Runs the sweep of a schedule step with the selected measurement driver."""
+    step = config.measurement_schedule[step_index]
+    return get_measurement_driver().run_sweep(
+        step.channel,
+        step.iteration,
+        step.position,
+        step.audio,
+        message_ui,
+        cancel_token,
+    )
+
+
+def check_sweep(new_uuids: set, message_ui) -> bool:
+    """Checks REW for new problems after a sweep and deletes the measurements of a bad sweep."""
+    message_ui.info(
+        f"{config.PRINTFORMAT['INFO']} Checking for new problems after sweep"
+    )
+    problems = problem_tracker.check()
+    for problem in problems:
+        event_log.emit("problem", problem=problem)
+
+    if not problems and new_uuids:
         message_ui.info(
-            f"{config.PRINTFORMAT['INFO']} Checking for new problems after sweep"
+            f"{config.PRINTFORMAT['OK']} No new problems detected. Sweep successful."
         )
-        new_problem_times, problems = check_new_problems(previous_problem_times)
+        return True
 
-        if not new_problem_times:
-            message_ui.info(
-                f"{config.PRINTFORMAT['OK']} No new problems detected. Sweep successful."
-            )
-            return True
+    if problems:
+        message_ui.info(
+            f"{config.PRINTFORMAT['WARNING']} New problem detected ({problems[-1]['type']}): {problems[-1].get('title')}"
+        )
+    else:
         message_ui.info(
-            f"{config.PRINTFORMAT['WARNING']} New problem detected: {problems[-1]['title']}"
+            f"{config.PRINTFORMAT['WARNING']} REW did not create a new measurement for this sweep"
         )
 
-        # Deleting bad measurement
+    # Deleting only the measurements this sweep created
+    for uuid in new_uuids:
         message_ui.info(f"{config.PRINTFORMAT['INFO']} Deleting bad measurement")
-        delete_measurement(get_selected_measurement_uuid())
+        delete_measurement(uuid)
+    return False
+
+
+def annotate_sweep(step_index: int, new_uuids: set):
+    """Names and tags the new measurements and caches their summaries."""
+    step = config.measurement_schedule[step_index]
+    for uuid in new_uuids:
+        annotate_measurement(
+            uuid,
+            step.channel,
+            step.iteration,
+            step.position,
+            step.audio,
+            step_id=step_index + 1,
+        )
+        get_measurement_summary(uuid)
+
+
+def sweep_and_check_problems(
+    step_index: int,
+    message_ui,
+    cancel_token: CancelToken,
+    max_attempts=MAX_ATTEMPTS,
+):
+    """Runs sweep and checks for new problems, retrying up to max_attempts times.
+
+    Returns whether the sweep succeeded and the uuids of the measurements it created in REW.
+    """
+
+    # Ignore problems and measurements from before this sweep
+    sweep_pipeline.wait(cancel_token)
+    problem_tracker.mark()
+    measurement_index.mark()
+
+    attempts = 0
+
+    while attempts < max_attempts:
+        # Check for control events and break if a stop was requested.
+        if cancel_token.check():
+            break
+
+        sweep_completed = run_step_sweep(step_index, message_ui, cancel_token)
 
-        # Check for control events and break if stop_event is set.
-        if check_control_events(pause_event, stop_event, message_ui):
+        # Check for control events and break if a stop was requested.
+        if cancel_token.check():
             break
 
-        # Update initial_times to avoid detecting the same problem in the next iteration
-        previous_problem_times.update(new_problem_times)
+        if not sweep_completed:
+            # The sweep was paused midway. Ignore whatever it left behind and play it again.
+            problem_tracker.mark()
+            measurement_index.mark()
+            message_ui.info(f"{config.PRINTFORMAT['INFO']} Repeating interrupted sweep")
+            continue
+        attempts += 1
+
+        new_uuids = measurement_index.take_added()
+        if check_sweep(new_uuids, message_ui):
+            annotate_sweep(step_index, new_uuids)
+            return True, new_uuids
+
+        # Check for control events and break if a stop was requested.
+        if cancel_token.check():
+            break
 
         if attempts < max_attempts:
             message_ui.info(f"Retrying sweep... Attempt {attempts + 1}")
@@ -218,4 +274,6 @@ def sweep_and_check_problems(
             message_ui.input(
                 f"Reached max attempts of {max_attempts}. Do you want to continue trying or abort?"
             )
-            return False
+            return False, set()
+
+    return False, set()
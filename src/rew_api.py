@@ -1,19 +1,156 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import (
     BASE_URL_ENDPOINT,
     ERROR_ENDPOINT,
+    LAST_ERROR_ENDPOINT,
+    LAST_WARNING_ENDPOINT,
     MEASUREMENT_ENDPOINT,
     MEASUREMENT_UUID_ENDPOINT,
+    MEASURE_ENDPOINT,
+    PROBLEM_TYPES,
+    REW_BACKOFF,
+    REW_POOL_SIZE,
+    REW_RETRIES,
+    REW_TIMEOUT,
+    SUMMARY_CACHE_SIZE,
     VERSION_ENDPOINT,
     WARNING_ENDPOINT,
 )
+from event_log import event_log
+
+# Sending these twice has the same effect as sending them once, so they are safe to retry
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def default_endpoint_stats():
+    return {"calls": 0, "errors": 0, "retries": 0, "total_time": 0.0, "max_time": 0.0}
+
+
+class RewClient:
+    """Shared client for the REW API.
+
+    Keeps a pooled keep-alive session to REW, applies a deadline to every call,
+    retries connection errors and 5xx responses of idempotent requests with
+    exponential backoff and records latency and error counters per endpoint.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL_ENDPOINT,
+        timeout: float = REW_TIMEOUT,
+        retries: int = REW_RETRIES,
+        backoff: float = REW_BACKOFF,
+        pool_size: int = REW_POOL_SIZE,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+
+        self._stats = defaultdict(default_endpoint_stats)
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        deadline: float | None = None,
+        retries: int | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request to REW, retrying until it succeeds or the deadline passes.
+
+        Only idempotent methods are retried by default: a retried POST such as the
+        Sweep measure command could start a second measurement.
+
+        Raises requests.RequestException if REW could not answer in time.
+        """
+        deadline = time.monotonic() + (self.timeout if deadline is None else deadline)
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        key = f"{method} {re.sub(r'/[0-9a-fA-F-]{36}', '/{id}', endpoint)}"
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._record(key, 0.0, error=True)
+                raise requests.Timeout(f"Deadline exceeded for {key}")
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, f"{self.base_url}{endpoint}", timeout=remaining, **kwargs
+                )
+                # Server errors are worth retrying, client errors are left to the caller
+                if response.status_code >= 500:
+                    response.raise_for_status()
+                self._record(key, time.perf_counter() - start)
+                return response
+            except requests.RequestException:
+                self._record(key, time.perf_counter() - start, error=True)
+                delay = self.backoff * 2**attempt
+                if attempt >= retries or delay >= deadline - time.monotonic():
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                with self._lock:
+                    self._stats[key]["retries"] += 1
+
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("POST", endpoint, **kwargs)
+
+    def put(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("PUT", endpoint, **kwargs)
+
+    def delete(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", endpoint, **kwargs)
+
+    def _record(self, key: str, elapsed: float, error: bool = False):
+        with self._lock:
+            stats = self._stats[key]
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def get_stats(self) -> dict:
+        """Return a copy of the per-endpoint counters with the average latency added."""
+        with self._lock:
+            return {
+                key: {**stats, "avg_time": stats["total_time"] / stats["calls"]}
+                for key, stats in self._stats.items()
+                if stats["calls"]
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+rew_client = RewClient()
 
 
 def ensure_rew_api():
     """Check if the REW API is running."""
     try:
-        response = requests.get(VERSION_ENDPOINT, timeout=3)
+        # Fail fast: a single attempt with the default deadline
+        response = rew_client.get(VERSION_ENDPOINT, retries=0)
         return response.status_code == 200
     except requests.exceptions.RequestException:
         return False
@@ -55,7 +192,7 @@ def ensure_rew_settings():
 
     for endpoint, expected_values in ENDPOINTS.items():
         try:
-            response = requests.get(f"{BASE_URL_ENDPOINT}{endpoint}").json()
+            response = rew_client.get(endpoint).json()
             # If the response is a boolean, convert it into an object
             if type(response) is bool:
                 response = {"body": response}
@@ -75,85 +212,363 @@ def ensure_rew_settings():
     return errors
 
 
+def log_rew_error(operation: str, error: Exception):
+    """Record a failed API call as plain fields, the console formats it when shown."""
+    event_log.emit("rew_error", operation=operation, error=str(error))
+
+
 def get_measure_errors():
     """Fetch the latest problem from the endpoint."""
     try:
-        response = requests.get(ERROR_ENDPOINT)
+        response = rew_client.get(ERROR_ENDPOINT)
         response.raise_for_status()
         data = response.json()
         return (
             data if isinstance(data, list) else []
         )  # Ensure it handles empty problems
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
+        log_rew_error("fetching errors", e)
         return []
 
 
 def get_measure_warnings():
     """Fetch the latest problem from the endpoint."""
     try:
-        response = requests.get(WARNING_ENDPOINT)
+        response = rew_client.get(WARNING_ENDPOINT)
         response.raise_for_status()
         data = response.json()
         return (
             data if isinstance(data, list) else []
         )  # Ensure it handles empty problems
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
+        log_rew_error("fetching warnings", e)
         return []
 
 
-def check_new_problems(previous_times):
-    problems = get_measure_warnings() + get_measure_errors()
-    problem_times = {problem.get("time", "") for problem in problems}
-    new_problem_times = problem_times - previous_times
-    return new_problem_times, problems
+def classify_problem(problem: dict) -> str:
+    """Classify a REW warning or error as one of the PROBLEM_TYPES, or 'other'."""
+    text = f"{problem.get('title', '')} {problem.get('message', '')}".lower()
+    for problem_type, keywords in PROBLEM_TYPES.items():
+        if any(keyword in text for keyword in keywords):
+            return problem_type
+    return "other"
+
+
+def get_problem_key(problem) -> tuple | None:
+    """Get the time and message that identify a REW warning or error, None if it has none."""
+    if not isinstance(problem, dict) or problem.get("time") is None:
+        return None
+    return problem["time"], problem.get("message")
+
+
+class ProblemTracker:
+    """Tracks REW warnings and errors, handling only entries logged since the last check.
+
+    REW only ever appends to its warning and error lists, so the tracker keeps a
+    high-water mark (the number of entries already handled) per list. Before a
+    list is downloaded, the time and message of the cheap last-warning/last-error
+    endpoint are compared with the last entry seen; the full list is fetched when
+    they differ or the endpoint answers with anything unexpected.
+    Both lists are checked at the same time.
+    """
+
+    SOURCES = {
+        "warning": (WARNING_ENDPOINT, LAST_WARNING_ENDPOINT),
+        "error": (ERROR_ENDPOINT, LAST_ERROR_ENDPOINT),
+    }
+
+    def __init__(self, client: RewClient | None = None):
+        self.client = client or rew_client
+        self._handled = {source: 0 for source in self.SOURCES}
+        self._last_seen = {source: None for source in self.SOURCES}
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.SOURCES), thread_name_prefix="problem-tracker"
+        )
+
+    def mark(self):
+        """Move the high-water mark to the end of both lists without reporting anything."""
+        self.check()
+
+    def check(self) -> list[dict]:
+        """Return the problems logged since the last check, each with a 'source' and 'type' key."""
+        futures = [
+            self._executor.submit(self._check_source, source) for source in self.SOURCES
+        ]
+        new_problems = []
+        for future in futures:
+            new_problems.extend(future.result())
+        return new_problems
+
+    def _check_source(self, source: str) -> list[dict]:
+        list_endpoint, last_endpoint = self.SOURCES[source]
+        if self._last_seen[source] is not None and self._is_last_seen(
+            source, last_endpoint
+        ):
+            return []
+
+        try:
+            response = self.client.get(list_endpoint)
+            response.raise_for_status()
+            problems = response.json()
+        except requests.RequestException as e:
+            log_rew_error(f"fetching {source}s", e)
+            return []
+
+        if not isinstance(problems, list):
+            problems = []
+
+        # The list only shrinks when REW was restarted, in which case everything is new
+        handled = self._handled[source] if len(problems) >= self._handled[source] else 0
+        new_problems = [
+            {**problem, "source": source, "type": classify_problem(problem)}
+            for problem in problems[handled:]
+        ]
+
+        self._handled[source] = len(problems)
+        self._last_seen[source] = get_problem_key(problems[-1]) if problems else None
+        return new_problems
+
+    def _is_last_seen(self, source: str, last_endpoint: str) -> bool:
+        """Return True only if REW's last problem is certainly the last one handled."""
+        try:
+            response = self.client.get(last_endpoint)
+            response.raise_for_status()
+            last = response.json()
+        except (requests.RequestException, ValueError):
+            return False  # Fall back to the full list
+        key = get_problem_key(last)
+        return key is not None and key == self._last_seen[source]
+
+
+problem_tracker = ProblemTracker()
 
 
 def get_selected_measurement_uuid():
     """Get the id of the selected measurement. Assumption is that selected measurement is the latest one."""
     try:
-        response = requests.get(MEASUREMENT_UUID_ENDPOINT)
+        response = rew_client.get(MEASUREMENT_UUID_ENDPOINT)
         response.raise_for_status()
         data = response.json()
         uuid = data["message"]
         return uuid
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
+        log_rew_error("fetching the selected measurement", e)
         return {}
 
 
 def get_measurements():
     """Get a list of measurements."""
     try:
-        response = requests.get(MEASUREMENT_ENDPOINT)
+        response = rew_client.get(MEASUREMENT_ENDPOINT)
         response.raise_for_status()
         data = response.json()
         return data
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
+        log_rew_error("fetching measurements", e)
         return {}
 
 
+class SummaryCache:
+    """Bounded LRU cache of measurement summaries keyed by uuid.
+
+    Summaries do not change unless the measurement is edited or deleted, so they
+    are only fetched from REW once. The measurement index evicts entries when a
+    measurement disappears or changes, and delete_measurement evicts its entry.
+    """
+
+    def __init__(self, client: RewClient | None = None, maxsize: int = SUMMARY_CACHE_SIZE):
+        self.client = client or rew_client
+        self.maxsize = maxsize
+        self.summaries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, uuid: str) -> dict:
+        """Return the summary of the measurement, fetching it from REW if it is not cached."""
+        with self._lock:
+            if uuid in self.summaries:
+                self.hits += 1
+                self.summaries.move_to_end(uuid)
+                return self.summaries[uuid]
+            self.misses += 1
+
+        try:
+            response = self.client.get(MEASUREMENT_ENDPOINT + "/" + uuid)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException as e:
+            log_rew_error("fetching a measurement summary", e)
+            return {}
+
+        with self._lock:
+            self.summaries[uuid] = data
+            self.summaries.move_to_end(uuid)
+            while len(self.summaries) > self.maxsize:
+                self.summaries.popitem(last=False)
+        return data
+
+    def evict(self, *uuids: str):
+        with self._lock:
+            for uuid in uuids:
+                self.summaries.pop(uuid, None)
+
+    def clear(self):
+        with self._lock:
+            self.summaries.clear()
+
+    def get_stats(self) -> dict:
+        """Return the hit and miss counters and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.summaries),
+            }
+
+
+summary_cache = SummaryCache()
+
+
+class MeasurementIndex:
+    """Cached listing of the measurements in REW.
+
+    Every refresh diffs the new listing against the cache, so the uuids a sweep
+    created are known exactly instead of assuming the selected measurement is new.
+    Uuids added since the last mark() are collected until take_added() is called.
+    """
+
+    def __init__(self, client: RewClient | None = None):
+        self.client = client or rew_client
+        self.measurements: dict = {}  # uuid -> listing entry
+        self._added: set = set()
+        self._lock = threading.Lock()
+
+    def refresh(self) -> tuple[set, set]:
+        """Fetch the listing and return the (added, removed) uuids since the last refresh."""
+        try:
+            response = self.client.get(MEASUREMENT_ENDPOINT)
+            response.raise_for_status()
+            listing = response.json()
+        except requests.RequestException as e:
+            log_rew_error("fetching measurements", e)
+            return set(), set()
+
+        # REW returns measurements keyed by their index, but accept a plain list too
+        if isinstance(listing, dict):
+            listing = listing.values()
+        measurements = {
+            entry["uuid"]: entry
+            for entry in listing
+            if isinstance(entry, dict) and "uuid" in entry
+        }
+
+        with self._lock:
+            added = measurements.keys() - self.measurements.keys()
+            removed = self.measurements.keys() - measurements.keys()
+            changed = {
+                uuid
+                for uuid in measurements.keys() & self.measurements.keys()
+                if measurements[uuid] != self.measurements[uuid]
+            }
+            self.measurements = measurements
+            self._added = (self._added | added) - removed
+
+        # Summaries of measurements that were removed or edited are stale
+        summary_cache.evict(*removed, *changed)
+        return added, removed
+
+    def uuids(self) -> set:
+        """Return the cached uuids without asking REW."""
+        with self._lock:
+            return set(self.measurements)
+
+    def mark(self):
+        """Bring the cache up to date and start collecting newly added uuids."""
+        self.refresh()
+        with self._lock:
+            self._added = set()
+
+    def take_added(self) -> set:
+        """Return the uuids added since mark() and start collecting again."""
+        self.refresh()
+        with self._lock:
+            added, self._added = self._added, set()
+        return added
+
+    def update(self, uuid: str, **fields):
+        """Record an edit made through the API, so the next refresh doesn't see it as a change."""
+        with self._lock:
+            if uuid in self.measurements:
+                self.measurements[uuid] = {**self.measurements[uuid], **fields}
+
+    def forget(self, uuid: str):
+        """Drop a measurement from the cache, e.g. after deleting it."""
+        with self._lock:
+            self.measurements.pop(uuid, None)
+            self._added.discard(uuid)
+
+
+measurement_index = MeasurementIndex()
+
+
 def get_measurement_summary(uuid):
-    """Get a summary of the measurement by uuid."""
+    """Get a summary of the measurement by uuid. Summaries are cached until the measurement changes."""
+    return summary_cache.get(uuid)
+
+
+def delete_measurement(uuid):
+    """Delete a measurement by uuid."""
     try:
-        response = requests.get(MEASUREMENT_ENDPOINT + "/" + uuid)
+        response = rew_client.delete(MEASUREMENT_ENDPOINT + "/" + uuid)
         response.raise_for_status()
+        measurement_index.forget(uuid)
+        summary_cache.evict(uuid)
         data = response.json()
         return data
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
+        log_rew_error("deleting a measurement", e)
         return {}
 
 
-def delete_measurement(uuid):
-    """Get the id of the selected measurement. Assumption is that selected measurement is the latest one."""
+def get_measure_commands() -> list:
+    """Get the measurement commands REW accepts through the API."""
     try:
-        response = requests.delete(MEASUREMENT_ENDPOINT + "/" + uuid)
+        response = rew_client.get(MEASURE_ENDPOINT)
         response.raise_for_status()
         data = response.json()
-        return data
+        return data if isinstance(data, list) else []
     except requests.RequestException as e:
-        print(f"Error fetching problems: {e}")
-        return {}
+        log_rew_error("fetching measure commands", e)
+        return []
+
+
+def send_measure_command(command: str) -> bool:
+    """Issue a measurement command such as starting a sweep."""
+    try:
+        response = rew_client.post(MEASURE_ENDPOINT, json={"command": command})
+        response.raise_for_status()
+        return True
+    except requests.RequestException as e:
+        log_rew_error(f"sending the {command} measure command", e)
+        return False
+
+
+def update_measurement(uuid: str, title: str | None = None, notes: str | None = None):
+    """Update the title and/or notes of a measurement."""
+    body = {
+        key: value
+        for key, value in {"title": title, "notes": notes}.items()
+        if value is not None
+    }
+    try:
+        response = rew_client.put(MEASUREMENT_ENDPOINT + "/" + uuid, json=body)
+        response.raise_for_status()
+        measurement_index.update(uuid, **body)
+        summary_cache.evict(uuid)
+        return True
+    except requests.RequestException as e:
+        log_rew_error("updating a measurement", e)
+        return False
@@ -0,0 +1,326 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid as uuid_module
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+VERSION = "5.40 (AutomatedSweeps emulator)"
+
+# The settings ensure_rew_settings expects, keyed by endpoint
+DEFAULT_SETTINGS = {
+    "/measure/naming": {
+        "namingOption": "Use as entered",
+        "prefixMeasNameWithOutput": False,
+    },
+    "/measure/playback-mode": {"message": "From file"},
+    "/measure/protection-options": {"clippingAbort": True},
+    "/measure/capture-noise-floor": True,
+}
+
+# Problems that can be injected into a sweep, worded so classify_problem recognises them
+PROBLEMS = {
+    "clipping": ("warning", "Input clipping", "Heavy input clipping occurred during the sweep"),
+    "timing": ("warning", "Timing reference", "The acoustic reference was not detected"),
+    "low_snr": ("warning", "Low signal to noise", "Signal to noise ratio is too low"),
+    "other": ("error", "Measurement failed", "The capture device reported an error"),
+}
+
+SPEED_OF_SOUND = 343  # m/s, as used by get_microphone_distance
+IR_PEAK_SECONDS = 0.01  # Time of the IR peak of a centred microphone
+
+UUID_PATH = re.compile(r"^/measurements/([0-9a-fA-F-]{36})$")
+
+
+class RewEmulator:
+    """Offline stand-in for the REW API, for tests, benchmarks and demos.
+
+    Serves the endpoints this project uses on a local ThreadingHTTPServer. A Sweep
+    measure command adds a measurement after sweep_duration seconds. Every
+    request is delayed by latency seconds and fails with a 503 at failure_rate.
+    Problems are logged for a sweep at problem_rate, or scripted with inject().
+    mic_offset_cm moves the IR peak of FL measurements so the microphone position
+    check sees a misplaced microphone.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 4735,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        problem_rate: float = 0.0,
+        sweep_duration: float = config.EMULATOR_SWEEP_DURATION,
+        mic_offset_cm: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.problem_rate = problem_rate
+        self.sweep_duration = sweep_duration
+        self.mic_offset_cm = mic_offset_cm
+        self.random = random.Random(seed)
+
+        self.settings = json.loads(json.dumps(DEFAULT_SETTINGS))
+        self.measurements: dict = {}  # uuid -> measurement, in the order they were made
+        self.selected_uuid: str | None = None
+        self.warnings: list = []
+        self.errors: list = []
+        self.requests = 0
+        self._injected: list[str] = []
+        self._pending: threading.Timer | None = None
+        self._lock = threading.RLock()
+
+        self.server = ThreadingHTTPServer((host, port), RewRequestHandler)
+        self.server.daemon_threads = True
+        self.server.emulator = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Serve on a background thread. Returns the base URL."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="rew-emulator", daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.cancel()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def inject(self, *problem_types: str):
+        """Log these problems with the next sweeps, one per sweep."""
+        for problem_type in problem_types:
+            if problem_type not in PROBLEMS:
+                raise ValueError(f"Unknown problem type: {problem_type}")
+        with self._lock:
+            self._injected.extend(problem_types)
+
+    def measure(self, command: str) -> tuple[int, dict]:
+        with self._lock:
+            if command == "Sweep":
+                if self._pending is not None:
+                    return 409, {"message": "A measurement is already running"}
+                self._pending = threading.Timer(self.sweep_duration, self._finish_sweep)
+                self._pending.daemon = True
+                self._pending.start()
+                return 202, {"message": "Measurement started"}
+            if command == "Cancel":
+                if self._pending is not None:
+                    self._pending.cancel()
+                    self._pending = None
+                return 200, {"message": "Measurement cancelled"}
+        return 400, {"message": f"Unknown measure command: {command}"}
+
+    def _finish_sweep(self):
+        with self._lock:
+            self._pending = None
+            uuid = str(uuid_module.uuid4())
+            self.measurements[uuid] = {
+                "title": f"Measurement {len(self.measurements) + 1}",
+                "notes": "",
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "uuid": uuid,
+                "startFreq": 10.0,
+                "endFreq": 24000.0,
+                "sampleRate": 48000,
+            }
+            self.selected_uuid = uuid
+
+            if self._injected:
+                problem_type = self._injected.pop(0)
+            elif self.random.random() < self.problem_rate:
+                problem_type = self.random.choice(list(PROBLEMS))
+            else:
+                return
+            source, title, message = PROBLEMS[problem_type]
+            problems = self.warnings if source == "warning" else self.errors
+            problems.append({"time": time.time(), "title": title, "message": message})
+
+    def get_summary(self, uuid: str) -> dict:
+        measurement = self.measurements[uuid]
+        # Only FL is moved, so FL - FR gives the offset get_microphone_distance reports
+        peak = IR_PEAK_SECONDS
+        if measurement["title"].split(" ")[0] == "FL":
+            peak += self.mic_offset_cm / 100 / SPEED_OF_SOUND
+        return {**measurement, "timeOfIRPeakSeconds": peak}
+
+    def handle(self, method: str, path: str, body) -> tuple[int, object]:
+        """Answer one API call. Returns the status code and the JSON body."""
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            return 503, {"message": "Injected failure"}
+
+        with self._lock:
+            if path == config.VERSION_ENDPOINT and method == "GET":
+                return 200, {"message": VERSION}
+            if path == config.MEASURE_ENDPOINT:
+                if method == "GET":
+                    return 200, ["Sweep", "Cancel"]
+                if method == "POST" and isinstance(body, dict):
+                    return self.measure(body.get("command"))
+            if path in self.settings:
+                if method == "GET":
+                    return 200, self.settings[path]
+                if method in ("POST", "PUT"):
+                    current = self.settings[path]
+                    if isinstance(current, dict) != isinstance(body, dict):
+                        return 400, {"message": f"Invalid settings for {path}"}
+                    self.settings[path] = (
+                        {**current, **body} if isinstance(current, dict) else body
+                    )
+                    return 200, {"message": "Settings updated"}
+            if method == "GET" and path == config.WARNING_ENDPOINT:
+                return 200, self.warnings
+            if method == "GET" and path == config.ERROR_ENDPOINT:
+                return 200, self.errors
+            if method == "GET" and path == config.LAST_WARNING_ENDPOINT:
+                return 200, self.warnings[-1] if self.warnings else None
+            if method == "GET" and path == config.LAST_ERROR_ENDPOINT:
+                return 200, self.errors[-1] if self.errors else None
+            if method == "GET" and path == config.MEASUREMENT_ENDPOINT:
+                # REW keys the listing by the measurement index
+                return 200, {
+                    str(index): measurement
+                    for index, measurement in enumerate(self.measurements.values(), 1)
+                }
+            if method == "GET" and path == config.MEASUREMENT_UUID_ENDPOINT:
+                return 200, {"message": self.selected_uuid}
+
+            match = UUID_PATH.match(path)
+            if match:
+                uuid = match.group(1)
+                if uuid not in self.measurements:
+                    return 404, {"message": f"No measurement with uuid {uuid}"}
+                if method == "GET":
+                    return 200, self.get_summary(uuid)
+                if method == "PUT" and isinstance(body, dict):
+                    for key in ("title", "notes"):
+                        if key in body:
+                            self.measurements[uuid][key] = body[key]
+                    return 200, {"message": "Measurement updated"}
+                if method == "DELETE":
+                    del self.measurements[uuid]
+                    if self.selected_uuid == uuid:
+                        self.selected_uuid = next(reversed(self.measurements), None)
+                    return 200, {"message": "Measurement deleted"}
+
+        return 404, {"message": f"Unknown endpoint {method} {path}"}
+
+
+class RewRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like REW and the pooled client
+
+    def _handle(self):
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except json.JSONDecodeError:
+                body = None
+
+        status, data = self.server.emulator.handle(
+            self.command, self.path.split("?")[0], body
+        )
+        payload = json.dumps(data).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except ConnectionError:
+            self.close_connection = True  # The client gave up, e.g. at its deadline
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass  # Keep the console of the app or the test runner clean
+
+
+def add_emulator_arguments(parser: argparse.ArgumentParser, prefix: str = ""):
+    """Add the emulator options to a parser, with names starting with --{prefix}."""
+    options = [
+        ("latency", float, 0.0, "Seconds added to every request"),
+        ("failure-rate", float, 0.0, "Share of requests answered with a 503"),
+        ("problem-rate", float, 0.0, "Share of sweeps that log a problem"),
+        ("sweep-duration", float, config.EMULATOR_SWEEP_DURATION, "Seconds a sweep takes"),
+        ("mic-offset-cm", float, 0.0, "Distance the microphone is off centre"),
+        ("seed", int, None, "Seed for the random failures and problems"),
+    ]
+    for name, option_type, default, help in options:
+        parser.add_argument(
+            f"--{prefix}{name}", type=option_type, default=default, help=help
+        )
+    parser.add_argument(
+        f"--{prefix}problem",
+        action="append",
+        default=[],
+        choices=PROBLEMS,
+        help="Problem logged with the next sweep, can be repeated",
+    )
+
+
+def create_emulator(
+    arguments: argparse.Namespace,
+    host: str = "127.0.0.1",
+    port: int = 4735,
+    prefix: str = "",
+) -> RewEmulator:
+    """Create an emulator from the options added by add_emulator_arguments."""
+
+    def option(name: str):
+        return getattr(arguments, f"{prefix}{name}".replace("-", "_"))
+
+    emulator = RewEmulator(
+        host,
+        port,
+        latency=option("latency"),
+        failure_rate=option("failure-rate"),
+        problem_rate=option("problem-rate"),
+        sweep_duration=option("sweep-duration"),
+        mic_offset_cm=option("mic-offset-cm"),
+        seed=option("seed"),
+    )
+    emulator.inject(*option("problem"))
+    return emulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the REW API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4735)
+    add_emulator_arguments(parser)
+    arguments = parser.parse_args()
+
+    emulator = create_emulator(arguments, arguments.host, arguments.port)
+    print(f"REW emulator listening on {emulator.url}")
+    # Silent playback has to last as long as the emulated sweeps
+    print(
+        f"Run the app with {config.REW_URL_ENV}={emulator.url} {config.PLAYBACK_ENGINE_ENV}=silent "
+        f"{config.SILENT_SWEEP_DURATION_ENV}={emulator.sweep_duration}"
+    )
+    try:
+        emulator.server.serve_forever()
+    except KeyboardInterrupt:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import threading
+from enum import Enum
+
+
+class StepStatus(Enum):
+    NOT_STARTED = "Not started"
+    IN_PROGRESS = "In progress"
+    VERIFYING = "Verifying"
+    RETRYING = "Retrying"
+    COMPLETED = "Completed"
+
+
+# Styling is only applied when the schedule is rendered
+STATUS_STYLES = {
+    StepStatus.IN_PROGRESS: "yellow",
+    StepStatus.VERIFYING: "yellow",
+    StepStatus.RETRYING: "yellow",
+    StepStatus.COMPLETED: "green",
+}
+
+
+def render_status(status: StepStatus) -> str:
+    """Get the status as console markup."""
+    style = STATUS_STYLES.get(status)
+    return f"[{style}]{status.value}[/{style}]" if style else status.value
+
+
+def get_row(index: int, step: "Step") -> tuple:
+    """Get the cells of a step as shown in the schedule table."""
+    return (
+        f"#{index + 1}",
+        f"[cyan]{step.description}[/cyan]",
+        step.channel,
+        step.audio,
+        step.iteration,
+        step.position,
+        render_status(step.status),
+    )
+
+
+class Step:
+    """One row of the measurement schedule."""
+
+    __slots__ = ("description", "channel", "audio", "iteration", "position", "status")
+
+    def __init__(
+        self,
+        description: str,
+        channel: str = "---",
+        audio: str = "---",
+        iteration: str = "Utility",
+        position: str = "---",
+        status: StepStatus = StepStatus.NOT_STARTED,
+    ):
+        self.description = description
+        self.channel = channel
+        self.audio = audio
+        self.iteration = iteration
+        self.position = position
+        self.status = status
+
+    def __repr__(self):
+        return f"Step({self.description!r}, {self.channel!r}, {self.audio!r}, {self.iteration!r}, {self.position!r}, {self.status})"
+
+
+class StepTable:
+    """The measurement schedule: utility steps followed by a sweep per channel and iteration.
+
+    sync() only touches the rows affected by a configuration change, and every
+    row that changes is recorded so views can redraw just those rows.
+    """
+
+    def __init__(self):
+        self.steps: list[Step] = []
+        self._layout = None  # Centering flag and channels the rows were built for
+        self._channels: list[str] = []
+        self._sweeps_start = 0  # Index of the first sweep step
+        self._iterations = 0
+        self._audio: dict = {}
+        self._reference = None
+        self._position_name = None
+        self._dirty: set = set()
+        self._structure_changed = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index: int) -> Step:
+        return self.steps[index]
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def sync(
+        self,
+        channels: dict,
+        iterations: int,
+        mic_position: bool,
+        reference: bool,
+        position_name: str,
+    ):
+        """Bring the schedule in line with the configuration."""
+        layout = (mic_position, tuple(channels))
+        if layout != self._layout:
+            self._build_utility_steps(mic_position)
+            self._layout = layout
+            self._channels = list(channels)
+            self._audio = {}
+
+        # Update the sweeps that are kept before adding or removing iterations
+        step_count = len(self._channels)
+        for offset, channel in enumerate(self._channels):
+            audio = channels[channel]["audio"]
+            if self._audio.get(channel) != audio:
+                self._audio[channel] = audio
+                rows = range(self._sweeps_start + offset, len(self.steps), step_count)
+                self._update_rows(rows, "audio", audio)
+
+        if reference != self._reference:
+            self._reference = reference
+            rows = range(
+                self._sweeps_start, min(self._sweeps_start + step_count, len(self.steps))
+            )
+            self._update_rows(rows, "iteration", self._get_iteration_label(0))
+
+        if position_name != self._position_name:
+            self._position_name = position_name
+            rows = range(self._sweeps_start, len(self.steps))
+            self._update_rows(rows, "position", position_name)
+
+        if iterations != self._iterations:
+            self._resize(iterations)
+
+    def set_status(self, index: int, status: StepStatus):
+        """Set the status of a step and mark it for redrawing."""
+        self.steps[index].status = status
+        with self._lock:
+            self._dirty.add(index)
+
+    def reset_status(self):
+        """Set every step that has been run back to not started."""
+        for index, step in enumerate(self.steps):
+            if step.status is not StepStatus.NOT_STARTED:
+                self.set_status(index, StepStatus.NOT_STARTED)
+
+    def take_changes(self) -> tuple[bool, set]:
+        """Get whether rows were added or removed and which rows changed since the last call."""
+        with self._lock:
+            changes = (self._structure_changed, self._dirty)
+            self._structure_changed = False
+            self._dirty = set()
+        return changes
+
+    def _build_utility_steps(self, mic_position: bool):
+        # We always need the check settings step
+        self.steps = [Step("Check REW settings")]
+
+        if mic_position:
+            self.steps += [
+                Step("Measure distance", "FL", "FL", position="Reference"),
+                Step("Measure distance", "FR", "FR", position="Reference"),
+                Step("Check microphone position", position="Reference"),
+            ]
+        self._sweeps_start = len(self.steps)
+        self._iterations = 0
+        self._mark_structure_changed()
+
+    def _resize(self, iterations: int):
+        end = self._sweeps_start + iterations * len(self._channels)
+        if end < len(self.steps):
+            del self.steps[end:]
+        for iteration in range(self._iterations, iterations):
+            label = self._get_iteration_label(iteration)
+            for channel in self._channels:
+                self.steps.append(
+                    Step(
+                        "Measure sweep",
+                        channel,
+                        self._audio[channel],
+                        label,
+                        self._position_name,
+                    )
+                )
+        self._iterations = iterations
+        self._mark_structure_changed()
+
+    def _get_iteration_label(self, iteration: int) -> str:
+        return "Reference" if self._reference and iteration == 0 else f"{iteration + 1}"
+
+    def _update_rows(self, rows: range, field: str, value):
+        for index in rows:
+            setattr(self.steps[index], field, value)
+        with self._lock:
+            self._dirty.update(rows)
+
+    def _mark_structure_changed(self):
+        with self._lock:
+            self._structure_changed = True
+            self._dirty.clear()
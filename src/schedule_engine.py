@@ -0,0 +1,218 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from enum import Enum
+from typing import NamedTuple
+
+import config
+from event_log import event_log
+from pipeline import VerificationPipeline, sweep_pipeline
+from schedule import StepStatus, StepTable
+from utils import CancelToken
+
+MAX_ATTEMPTS = 3
+
+
+class Outcome(Enum):
+    COMPLETED = "completed"  # Continue with the next step
+    RETRY = "retry"  # Run the step again
+    VERIFYING = "verifying"  # Continue while the step is verified in the background
+
+
+class Transition(NamedTuple):
+    """What the engine does after a step was executed."""
+
+    outcome: Outcome
+    retry_from: int | None = None  # First step to run again on RETRY, defaults to the step itself
+
+
+class EngineState(Enum):
+    IDLE = "idle"
+    RUNNING = "running"
+    STOPPED = "stopped"
+    COMPLETED = "completed"
+
+
+STEP_TYPES: dict = {}
+
+
+def register_step_type(description: str):
+    """Class decorator registering a StepType for schedule steps with this description."""
+
+    def decorator(cls):
+        cls.description = description
+        STEP_TYPES[description] = cls
+        return cls
+
+    return decorator
+
+
+class StepType(ABC):
+    """Behaviour of one kind of schedule step."""
+
+    description = ""
+
+    @abstractmethod
+    def execute(self, engine: "ScheduleEngine", index: int) -> Transition:
+        """Run the step. Long-running steps should check engine.cancel_token."""
+
+    def verify(self, engine: "ScheduleEngine", index: int, *args) -> bool:
+        """Verify the step in the background after execute returned VERIFYING."""
+        return True
+
+
+class ScheduleEngine:
+    """Runs a measurement schedule as a state machine over registered step types.
+
+    The engine only talks to the outside world through message_ui (any object with
+    info, update, input and complete methods) and the cancel token, so it can run
+    and be benchmarked without Textual.
+    """
+
+    def __init__(
+        self,
+        schedule: StepTable,
+        message_ui,
+        cancel_token: CancelToken,
+        pipeline: VerificationPipeline = sweep_pipeline,
+    ):
+        self.schedule = schedule
+        self.message_ui = message_ui
+        self.cancel_token = cancel_token
+        self.pipeline = pipeline
+        self.state = EngineState.IDLE
+        self.context: dict = {}  # Data shared between steps, e.g. measurement uuids
+        self.timings = defaultdict(list)  # Step index -> seconds per execute/verify
+        self._queue: deque = deque()
+        self._failed_attempts: dict = defaultdict(int)
+        self._status_lock = threading.Lock()  # Held while a verification sets its status
+
+    def run(self):
+        """Run every step of the schedule until it is completed or stopped."""
+        self.state = EngineState.RUNNING
+        # Verifications of a stopped run must not re-queue their steps in this one
+        self.pipeline.reset(self.cancel_token)
+        self._queue = deque(range(len(self.schedule)))
+
+        while self._queue or self.pipeline.has_pending():
+            # Check for control events and break if a stop was requested.
+            if self.cancel_token.check():
+                break
+
+            if not self._queue and not self.pipeline.wait(self.cancel_token):
+                # Every step has been run, but the stop came before the last verification finished
+                break
+
+            # Steps that failed verification in the background are run again next
+            self._requeue_failed_steps()
+            if not self._queue:
+                continue
+
+            index = self._queue.popleft()
+            self._run_step(index)
+
+        # Check for control events and break if a stop was requested.
+        if self.cancel_token.check():
+            with self._status_lock:
+                self.state = EngineState.STOPPED
+            # Steps that failed verification belong to this run, the next one starts over
+            self.pipeline.take_failed()
+            stop_latency = self.cancel_token.record_stop_latency()
+            event_log.emit("schedule_stopped", stop_latency=stop_latency)
+            if stop_latency is not None:
+                self.message_ui.info(
+                    f"{config.PRINTFORMAT['INFO']} Measurement stopped {stop_latency * 1000:.0f} ms after the stop request"
+                )
+            return
+
+        self.state = EngineState.COMPLETED
+        event_log.emit("schedule_completed", timings=self.get_timings())
+        self.message_ui.complete()
+
+    def _run_step(self, index: int):
+        step = self.schedule[index]
+        step_type = STEP_TYPES[step.description]()
+
+        self.message_ui.info(
+            f"{config.PRINTFORMAT['INFO']} Running step: {step.description}"
+        )
+        self.set_status(index, StepStatus.IN_PROGRESS)
+
+        event_log.emit(
+            "step_started",
+            step=index + 1,
+            description=step.description,
+            channel=step.channel,
+        )
+        start = time.perf_counter()
+        transition = step_type.execute(self, index)
+        seconds = time.perf_counter() - start
+        self.timings[index].append(seconds)
+        event_log.emit(
+            "step_finished",
+            step=index + 1,
+            outcome=transition.outcome.value,
+            retry_from=transition.retry_from,
+            seconds=seconds,
+        )
+
+        # Check for control events and break if a stop was requested.
+        if self.cancel_token.check():
+            return
+
+        match transition.outcome:
+            case Outcome.COMPLETED:
+                self.set_status(index, StepStatus.COMPLETED)
+            case Outcome.VERIFYING:
+                pass  # Set by submit_verification, the verification may have finished already
+            case Outcome.RETRY:
+                self.set_status(index, StepStatus.RETRYING)
+                retry_from = index if transition.retry_from is None else transition.retry_from
+                self._queue.extendleft(reversed(range(retry_from, index + 1)))
+
+    def submit_verification(self, index: int, *args):
+        """Hand the step to the background pipeline; its StepType.verify is called with args."""
+        step_type = STEP_TYPES[self.schedule[index].description]()
+        self.set_status(index, StepStatus.VERIFYING)
+        self.pipeline.submit(index, self._verify, step_type, index, *args)
+
+    def _verify(self, step_type: StepType, index: int, *args) -> bool:
+        start = time.perf_counter()
+        verified = step_type.verify(self, index, *args)
+        seconds = time.perf_counter() - start
+        self.timings[index].append(seconds)
+        event_log.emit("step_verified", step=index + 1, verified=verified, seconds=seconds)
+        with self._status_lock:
+            # Once stopped the schedule may belong to the next run, leave it alone
+            if self.state is EngineState.RUNNING:
+                self.set_status(
+                    index, StepStatus.COMPLETED if verified else StepStatus.RETRYING
+                )
+        return verified
+
+    def _requeue_failed_steps(self):
+        """Put steps that failed background verification back at the front of the queue."""
+        for index in self.pipeline.take_failed():
+            self._failed_attempts[index] += 1
+            event_log.emit("retry", step=index + 1, attempt=self._failed_attempts[index] + 1)
+            if self._failed_attempts[index] >= MAX_ATTEMPTS:
+                self.message_ui.input(
+                    f"Reached max attempts of {MAX_ATTEMPTS} for step #{index + 1}. Do you want to continue trying or abort?"
+                )
+                self.cancel_token.wait_while_paused()
+                self._failed_attempts[index] = 0
+            else:
+                self.message_ui.info(
+                    f"Retrying step #{index + 1}... Attempt {self._failed_attempts[index] + 1}"
+                )
+            self._queue.appendleft(index)
+
+    def set_status(self, index: int, status: StepStatus):
+        self.schedule.set_status(index, status)
+        self.message_ui.update()
+
+    def get_timings(self) -> dict:
+        """Return the total seconds spent on each step, keyed by step number."""
+        return {index + 1: sum(times) for index, times in sorted(self.timings.items())}
+
@@ -3,17 +3,40 @@ from textual_serve.server import Server
 from utils import get_ip
 import sys
 
+import config
 
-def run_server():
-    """Starts the server with a new event loop."""
+
+def run_server(attach: bool = False):
+    """Serves viewers of the measurement session on the local network.
+
+    Every browser session gets a thin viewer app that attaches to one shared
+    measurement session. With attach the session is hosted by the app that
+    started this server, otherwise this process hosts it.
+    """
     local_ip = get_ip()
+    if not attach:
+        from engine_host import engine_host
+        from session import get_session
+        from web_api import web_api
+
+        engine_host.start(get_session())
+        api_url = web_api.start(get_session(), local_ip)
+        print(f"Lightweight control page and JSON API at {api_url}")
+    # The served apps use the same logging profile as the server
+    flags = "--viewer --noservebtn"
+    if config.debug_logging:
+        flags += " --debug"
     if getattr(sys, "frozen", False):
-        server = Server(r"AutomatedSweeps.exe --noservebtn", host=local_ip)
+        server = Server(
+            f"AutomatedSweeps.exe {flags}", host=local_ip, port=config.SERVE_PORT
+        )
     # When running as an executable
     else:
-        server = Server("textual run src\main.py --noservebtn", host=local_ip)
+        server = Server(
+            f"textual run src\\main.py {flags}", host=local_ip, port=config.SERVE_PORT
+        )
 
-    server.serve(debug=True)
+    server.serve(debug=config.debug_logging)
 
 
 # def run_server():
@@ -0,0 +1,502 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+
+import config
+from event_log import event_log
+from schedule import get_row
+from utils import CancelToken
+
+
+class SessionState(Enum):
+    IDLE = "idle"
+    RUNNING = "running"
+    PAUSED = "paused"
+
+
+def get_schedule_settings() -> dict:
+    """Get the configuration the measurement schedule is generated from."""
+    return {
+        "channels": {
+            channel: {"audio": mapping["audio"]}
+            for channel, mapping in config.selected_channels.items()
+        },
+        "iterations": config.measure_iterations,
+        "mic_position": config.measure_mic_position,
+        "reference": config.measure_reference,
+        "position_name": config.measure_position_name,
+    }
+
+
+def validate_schedule_settings(settings) -> dict:
+    """Check settings in the form of get_schedule_settings. Raises ValueError when they are invalid."""
+    keys = {"channels", "iterations", "mic_position", "reference", "position_name"}
+    if not isinstance(settings, dict) or set(settings) != keys:
+        raise ValueError(f"Settings must be an object with {sorted(keys)}")
+
+    channels = settings["channels"]
+    if not isinstance(channels, dict):
+        raise ValueError("channels must be an object")
+    for channel, mapping in channels.items():
+        if channel not in config.ALL_CHANNEL_NAMES:
+            raise ValueError(f"Unknown channel: {channel}")
+        # Like in the UI, a channel plays the audio file of one of the selected channels
+        if not isinstance(mapping, dict) or mapping.get("audio") not in channels:
+            raise ValueError(
+                f"The audio of {channel} must be one of the selected channels"
+            )
+
+    iterations = settings["iterations"]
+    if type(iterations) is not int or not 1 <= iterations <= config.MAX_ITERATIONS:
+        raise ValueError(
+            f"iterations must be a number from 1 to {config.MAX_ITERATIONS}"
+        )
+    for key in ("mic_position", "reference"):
+        if not isinstance(settings[key], bool):
+            raise ValueError(f"{key} must be true or false")
+    if not isinstance(settings["position_name"], str):
+        raise ValueError("position_name must be a string")
+    return settings
+
+
+def apply_schedule_settings(settings: dict):
+    """Write settings from get_schedule_settings back to the configuration."""
+    config.selected_channels.clear()
+    for channel, mapping in settings["channels"].items():
+        config.selected_channels[channel] = {
+            "audio": mapping["audio"],
+            "status": "Not started",
+        }
+    config.measure_iterations = settings["iterations"]
+    config.measure_mic_position = settings["mic_position"]
+    config.measure_reference = settings["reference"]
+    config.measure_position_name = settings["position_name"]
+
+
+class MessageUI:
+    """Non-blocking channel from the measurement worker to the session.
+
+    The worker only appends to a queue and never waits on a UI. The session
+    drains the queue once per frame. Schedule updates carry no data of their
+    own: the session sends the rows the step table reports as changed. Log
+    lines are written to the event log right away, which the session drains in
+    the same frame. Every call is queued with the time it was made, so the
+    stats cover the delay of each kind of message until a frame shows it.
+    """
+
+    KINDS = ("info", "update", "input", "complete")
+
+    def __init__(self, show_prompt, complete, cancel_token: CancelToken):
+        self.show_prompt = show_prompt
+        self.complete_schedule = complete
+        self.cancel_token = cancel_token
+        self._queue = deque()  # (kind, contents, time queued)
+        self._lock = threading.Lock()
+        self._stats = {
+            "messages": 0,
+            **{kind: 0 for kind in self.KINDS},
+            "drains": 0,
+            "max_depth": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+        }
+
+    def info(self, contents: str):
+        """Send an informational message to the UI."""
+        event_log.emit("message", message=contents)
+        self._put("info", None)
+
+    def update(self):
+        """Trigger a UI update for the measurement schedule."""
+        self._put("update", None)
+
+    def input(self, contents: str):
+        """Indicate that input is required from the user."""
+        # Pause right away so the worker waits for the answer even before the prompt is drawn
+        self.cancel_token.pause()
+        self._put("input", contents)
+
+    def complete(self):
+        """Indicate that the measurement schedule is complete."""
+        self._put("complete", None)
+
+    def _put(self, kind: str, contents):
+        with self._lock:
+            self._queue.append((kind, contents, time.perf_counter()))
+            self._stats["max_depth"] = max(self._stats["max_depth"], len(self._queue))
+
+    def drain(self):
+        """Apply every queued message. Called by the session once per frame."""
+        with self._lock:
+            messages, self._queue = self._queue, deque()
+        if not messages:
+            return
+
+        now = time.perf_counter()
+        for kind, contents, queued in messages:
+            latency = now - queued
+            self._stats[kind] += 1
+            self._stats["total_latency"] += latency
+            self._stats["max_latency"] = max(self._stats["max_latency"], latency)
+
+            if kind == "input":
+                self.show_prompt(contents)
+            elif kind == "complete":
+                self.complete_schedule()
+
+        self._stats["messages"] += len(messages)
+        self._stats["drains"] += 1
+
+    def get_stats(self) -> dict:
+        """Return the queue depth and message counters with the average latency added."""
+        with self._lock:
+            depth = len(self._queue)
+        return {
+            **self._stats,
+            "depth": depth,
+            "avg_latency": (
+                self._stats["total_latency"] / self._stats["messages"]
+                if self._stats["messages"]
+                else 0.0
+            ),
+        }
+
+
+class Viewer:
+    """A UI attached to the measurement session.
+
+    The session puts batches of changes in the viewer, which the UI takes once
+    per frame, and the UI controls the session with send().
+    """
+
+    def __init__(self, session: "MeasurementSession"):
+        self.session = session
+        self._batches = deque()
+        self._lock = threading.Lock()
+
+    def put(self, batch: dict):
+        with self._lock:
+            if len(self._batches) >= config.VIEWER_MAX_BACKLOG:
+                # The viewer fell behind, replace the backlog with the current state
+                self._batches.clear()
+                batch = self.session.get_snapshot()
+            self._batches.append(batch)
+
+    def take_batches(self) -> list:
+        """Return the batches of changes since the last call."""
+        with self._lock:
+            batches, self._batches = list(self._batches), deque()
+        return batches
+
+    def send(self, command: str, *args):
+        """Send a command such as start, pause, stop, answer or configure to the session."""
+        self.session.handle(command, *args)
+
+    def close(self):
+        self.session.detach(self)
+
+
+class MeasurementSession:
+    """The measurement session that every UI attaches to as a viewer.
+
+    The session owns the workflow thread, the schedule and the prompts. Once per
+    frame it collects console lines, changed schedule rows and state changes and
+    hands the same batch to every attached viewer, so any number of UIs show
+    one live session.
+    """
+
+    COMMANDS = ("start", "pause", "stop", "answer", "configure")
+
+    def __init__(self):
+        self.state = SessionState.IDLE
+        self.prompt: str | None = None
+        self.settings = get_schedule_settings()
+        self.cancel_token: CancelToken | None = None
+        self.message_ui: MessageUI | None = None
+        self._worker: threading.Thread | None = (
+            None  # The workflow thread of the last run
+        )
+        self._reset_on_exit = False  # Reset the statuses once the stopped worker exits
+        self._viewers: list[Viewer] = []
+        self._history = deque(maxlen=config.CONSOLE_MAX_LINES)  # Shown to new viewers
+        self._events: dict = {}  # State changes not yet sent to the viewers
+        self._lock = threading.RLock()
+
+        config.measurement_schedule.sync(**self._get_sync_arguments())
+
+        threading.Thread(target=self._pump, name="session", daemon=True).start()
+
+    def handle(self, command: str, *args):
+        """Run a command sent by a viewer."""
+        if command not in self.COMMANDS:
+            event_log.emit("unknown_command", command=command)
+            return
+        getattr(self, command)(*args)
+
+    def attach(self) -> Viewer:
+        """Attach a new viewer, starting with a snapshot of the session."""
+        with self._lock:
+            viewer = Viewer(self)
+            viewer.put(self.get_snapshot())
+            self._viewers.append(viewer)
+        event_log.emit("viewer_attached", viewers=len(self._viewers))
+        return viewer
+
+    def detach(self, viewer: Viewer):
+        with self._lock:
+            if viewer in self._viewers:
+                self._viewers.remove(viewer)
+        event_log.emit("viewer_detached", viewers=len(self._viewers))
+
+    def get_snapshot(self) -> dict:
+        """Get the complete state of the session as a batch."""
+        with self._lock:
+            return {
+                "snapshot": True,
+                "rebuild": [
+                    get_row(index, step)
+                    for index, step in enumerate(config.measurement_schedule)
+                ],
+                "messages": list(self._history),
+                "settings": self.settings,
+                "state": self.state.value,
+                "prompt": self.prompt,
+            }
+
+    def start(self):
+        """Start the measurement schedule, or resume it when paused.
+
+        Never blocks the viewer: the runs share the schedule, the pipeline and the
+        REW caches, so a new run waits on its own thread for the workflow of the
+        previous run to exit.
+        """
+        with self._lock:
+            if self.state is SessionState.PAUSED:
+                self._resume()
+                return
+            if self.state is SessionState.RUNNING:
+                return
+
+            event_log.emit(
+                "message",
+                message=f"{config.PRINTFORMAT['INFO']} [green]Starting measurement schedule...[/green]",
+            )
+            self.cancel_token = CancelToken()  # Used to pause and stop the thread
+            self.message_ui = MessageUI(
+                self._show_prompt, self._complete, self.cancel_token
+            )
+            self._set_state(SessionState.RUNNING)
+            self._worker = threading.Thread(
+                target=self._run_workflow,
+                args=(self.message_ui, self.cancel_token, self._worker),
+                name="measurement",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def pause(self):
+        """Pause the measurement schedule."""
+        with self._lock:
+            if self.state is not SessionState.RUNNING:
+                return
+            event_log.emit(
+                "message",
+                message=f"{config.PRINTFORMAT['INFO']} [yellow]Pausing measurement schedule...[/yellow]",
+            )
+            self.cancel_token.pause()
+            self._set_state(SessionState.PAUSED)
+
+    def stop(self):
+        """Stop the measurement schedule and reset the step statuses."""
+        with self._lock:
+            event_log.emit(
+                "message", message="[red]Stopping measurement schedule...[/red]"
+            )
+            if self.cancel_token is not None:
+                self.cancel_token.stop()  # Tell the thread to exit
+            self._set_prompt(None)
+            self._set_state(SessionState.IDLE)
+            if self._worker is not None and self._worker.is_alive():
+                # Resetting now would race the statuses the worker sets until it exits
+                self._reset_on_exit = True
+            else:
+                config.measurement_schedule.reset_status()
+
+    def answer(self, proceed: bool):
+        """Answer the open prompt: proceed resumes the schedule, otherwise it is stopped."""
+        with self._lock:
+            if self.prompt is None:
+                return  # Already answered by another viewer
+            if proceed:
+                self._resume()
+            else:
+                self.stop()
+
+    def configure(self, settings: dict):
+        """Regenerate the schedule from new settings. Ignored while measuring or when invalid."""
+        with self._lock:
+            if settings == self.settings:
+                return
+            try:
+                validate_schedule_settings(settings)
+            except ValueError as e:
+                self._refuse_settings(f"Invalid settings: {e}")
+                return
+            if self.state is not SessionState.IDLE:
+                self._refuse_settings(
+                    "Settings can't be changed during a measurement. Stop it first."
+                )
+                return
+
+            # The schedule is synced first, so a failure leaves the settings in use untouched
+            config.measurement_schedule.sync(**settings)
+            self.settings = settings
+            apply_schedule_settings(settings)
+
+            # A changed schedule starts from scratch
+            config.measurement_schedule.reset_status()
+            self._events["settings"] = settings
+
+    def _refuse_settings(self, reason: str):
+        event_log.emit("message", message=f"{config.PRINTFORMAT['WARNING']} {reason}")
+        # Put the viewers and the configuration back to the settings in use
+        apply_schedule_settings(self.settings)
+        self._events["settings"] = self.settings
+
+    def _run_workflow(
+        self,
+        message_ui: MessageUI,
+        cancel_token: CancelToken,
+        previous: threading.Thread | None = None,
+    ):
+        if previous is not None and not self._wait_for_previous(previous, cancel_token):
+            return
+        try:
+            if cancel_token.stopped:
+                return  # Stopped while the previous run was exiting
+
+            from process import run_workflow
+
+            run_workflow(message_ui, cancel_token)
+        except Exception as e:
+            event_log.emit(
+                "workflow_error",
+                message=f"{config.PRINTFORMAT['ERROR']} Measurement schedule failed: {e}",
+            )
+            with self._lock:
+                if self.cancel_token is cancel_token:
+                    self._set_prompt(None)
+                    self._set_state(SessionState.IDLE)
+        finally:
+            event_log.emit("message_stats", **message_ui.get_stats())
+            with self._lock:
+                if self._reset_on_exit:
+                    self._reset_on_exit = False
+                    config.measurement_schedule.reset_status()
+
+    def _wait_for_previous(
+        self, previous: threading.Thread, cancel_token: CancelToken
+    ) -> bool:
+        """Wait for the workflow of the previous run. Returns False if it didn't exit."""
+        previous.join(config.WORKFLOW_STOP_TIMEOUT)
+        if not previous.is_alive():
+            return True
+
+        event_log.emit(
+            "message",
+            message=f"{config.PRINTFORMAT['WARNING']} The previous measurement is still stopping. Try again in a moment.",
+        )
+        with self._lock:
+            if self._worker is threading.current_thread():
+                self._worker = previous  # The next run has to wait for it instead
+            if self.cancel_token is cancel_token:
+                self._set_prompt(None)
+                self._set_state(SessionState.IDLE)
+        return False
+
+    def _resume(self):
+        event_log.emit(
+            "message",
+            message=f"{config.PRINTFORMAT['INFO']} Resuming measurement schedule...",
+        )
+        self.cancel_token.resume()  # Unpause the worker
+        self._set_prompt(None)
+        self._set_state(SessionState.RUNNING)
+
+    def _show_prompt(self, contents: str):
+        with self._lock:
+            self._set_prompt(contents)
+            self._set_state(SessionState.PAUSED)
+
+    def _complete(self):
+        with self._lock:
+            event_log.emit(
+                "message",
+                message=f"{config.PRINTFORMAT['INFO']} [green]Completed measurement schedule.[/green]",
+            )
+            self.cancel_token.stop()  # Tell the thread to exit
+            self._set_state(SessionState.IDLE)
+
+    def _set_state(self, state: SessionState):
+        self.state = state
+        self._events["state"] = state.value
+
+    def _set_prompt(self, prompt: str | None):
+        self.prompt = prompt
+        self._events["prompt"] = prompt
+
+    def _get_sync_arguments(self) -> dict:
+        return {
+            "channels": config.selected_channels,
+            "iterations": config.measure_iterations,
+            "mic_position": config.measure_mic_position,
+            "reference": config.measure_reference,
+            "position_name": config.measure_position_name,
+        }
+
+    def _pump(self):
+        while True:
+            time.sleep(config.MESSAGE_DRAIN_INTERVAL)
+            self.pump()
+
+    def pump(self):
+        """Send everything that changed since the last frame to the viewers."""
+        if self.message_ui is not None:
+            self.message_ui.drain()
+
+        lines = event_log.take_messages()
+        structure_changed, changed_rows = config.measurement_schedule.take_changes()
+
+        with self._lock:
+            batch, self._events = self._events, {}
+            if lines:
+                batch["messages"] = lines
+                self._history.extend(lines)
+            if structure_changed:
+                batch["rebuild"] = [
+                    get_row(index, step)
+                    for index, step in enumerate(config.measurement_schedule)
+                ]
+            elif changed_rows:
+                batch["rows"] = {
+                    index: get_row(index, config.measurement_schedule[index])
+                    for index in sorted(changed_rows)
+                    if index < len(config.measurement_schedule)
+                }
+            if batch:
+                for viewer in self._viewers:
+                    viewer.put(batch)
+
+
+_session: MeasurementSession | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> MeasurementSession:
+    """Return the measurement session of this process, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = MeasurementSession()
+        return _session
@@ -0,0 +1,76 @@
+import datetime
+import json
+import os
+import threading
+
+from config import JOURNAL_FILE
+from schedule import Step
+
+# Fields that identify a schedule step across runs
+STEP_KEY_FIELDS = ("description", "channel", "audio", "iteration", "position")
+
+
+def get_step_key(step: Step) -> str:
+    """Get a key that identifies the step independently of its position in the schedule."""
+    return "|".join(str(getattr(step, field)) for field in STEP_KEY_FIELDS)
+
+
+class SessionJournal:
+    """Append-only journal of completed measurement steps.
+
+    Every completed sweep is written to disk together with the uuids of the
+    measurements it created, so a session that crashed or was stopped can skip
+    steps whose measurements are still present in REW when it is started again.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE):
+        self.path = path
+        self._records: dict | None = None  # Loaded on first use
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Return the latest journal record for every step key."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line behind
+                    continue
+                records[record["key"]] = record
+        return records
+
+    def record(self, step: Step, uuids):
+        """Append a completed step to the journal and flush it to disk."""
+        record = {
+            "key": get_step_key(step),
+            "uuids": sorted(uuids),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            if self._records is not None:
+                self._records[record["key"]] = record
+
+    def is_completed(self, step: Step, rew_uuids: set) -> bool:
+        """Return True if the step was completed earlier and its measurements are still in REW."""
+        with self._lock:
+            if self._records is None:
+                self._records = self.load()
+            record = self._records.get(get_step_key(step))
+        return bool(record and record["uuids"]) and set(record["uuids"]) <= rew_uuids
+
+    def clear(self):
+        """Start a new session by removing the journal."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._records = {}
+
+
+session_journal = SessionJournal()
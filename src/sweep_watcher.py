@@ -0,0 +1,76 @@
+import time
+
+import config
+from rew_api import delete_measurement, measurement_index
+from utils import CancelToken
+
+
+class SweepWatcher:
+    """Detects when a sweep is complete instead of sleeping for a fixed time.
+
+    A sweep is complete once VLC has finished playing and REW lists a measurement
+    that was not there when the watcher was started. SWEEP_TIMEOUT is the backstop.
+    The time spent waiting in each phase is returned so slow sweeps can be diagnosed.
+    All waits return early when the cancel token is stopped or paused.
+    """
+
+    def __init__(
+        self, cancel_token: CancelToken | None = None, timeout: float = config.SWEEP_TIMEOUT
+    ):
+        self.cancel_token = cancel_token or CancelToken()
+        self.timeout = timeout
+        self.new_uuids: set = set()
+        self._started = 0.0
+
+    def start(self):
+        """Bring the measurement index up to date. Call this before the sweep is started in REW."""
+        measurement_index.refresh()
+        self.new_uuids = set()
+        self._started = time.monotonic()
+
+    def wait(self, is_playing) -> dict:
+        """Block until the sweep is complete.
+
+        Args:
+            is_playing (callable): Returns True while the sweep audio is still playing.
+
+        Returns a dict with the seconds spent in each phase, whether the backstop was hit
+        and whether the wait was interrupted by a stop or pause.
+        """
+        deadline = self._started + self.timeout
+        timings = {"startup": 0.0, "playback": 0.0, "measurement": 0.0}
+        interrupted = False
+
+        # Wait for playback to start, then for it to finish
+        phase_start = time.monotonic()
+        while not is_playing() and time.monotonic() - phase_start < config.SWEEP_START_GRACE:
+            if interrupted := self.cancel_token.sleep(config.SWEEP_POLL_INTERVAL):
+                break
+        timings["startup"] = time.monotonic() - phase_start
+
+        phase_start = time.monotonic()
+        while not interrupted and is_playing() and time.monotonic() < deadline:
+            interrupted = self.cancel_token.sleep(config.SWEEP_POLL_INTERVAL)
+        timings["playback"] = time.monotonic() - phase_start
+
+        # Wait for REW to finish processing and list the new measurement
+        phase_start = time.monotonic()
+        while not interrupted and time.monotonic() < deadline:
+            added, _ = measurement_index.refresh()
+            self.new_uuids |= added
+            if self.new_uuids:
+                break
+            interrupted = self.cancel_token.sleep(config.SWEEP_MEASUREMENT_POLL_INTERVAL)
+        timings["measurement"] = time.monotonic() - phase_start
+
+        timings["total"] = time.monotonic() - self._started
+        timings["timed_out"] = not interrupted and not self.new_uuids
+        timings["interrupted"] = interrupted
+        return timings
+
+    def discard(self):
+        """Delete every measurement REW added since start(), e.g. after an interrupted sweep."""
+        added, _ = measurement_index.refresh()
+        for uuid in self.new_uuids | added:
+            delete_measurement(uuid)
+        self.new_uuids = set()
@@ -0,0 +1,135 @@
+import glob
+import os
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+import pyautogui
+
+import config
+from utils import get_correct_path
+
+
+class Match(NamedTuple):
+    """A template found on screen. The first four fields work with pyautogui.center."""
+
+    left: int
+    top: int
+    width: int
+    height: int
+    scale: float
+    score: float
+
+
+def get_display_scale() -> float:
+    """Return the Windows display scaling factor (1.0 is 100 %), or 1.0 on other systems."""
+    try:
+        import ctypes
+
+        return ctypes.windll.user32.GetDpiForSystem() / 96
+    except (AttributeError, OSError):
+        return 1.0
+
+
+class TemplateMatcher:
+    """Matches the button templates in assets/ against the screen.
+
+    Templates are loaded once as grayscale arrays and prepared for every scale in
+    LOCATOR_SCALES, starting with the one closest to the Windows display scaling.
+    Each search first runs on a downscaled screenshot (an image pyramid built with
+    cv2.pyrDown) and is then refined at full resolution around the best candidate.
+    """
+
+    def __init__(
+        self,
+        template_directory: str = "assets",
+        scales: tuple = config.LOCATOR_SCALES,
+        levels: int = config.LOCATOR_PYRAMID_LEVELS,
+        threshold: float = config.LOCATOR_CONFIDENCE,
+    ):
+        self.levels = levels
+        self.threshold = threshold
+        display_scale = get_display_scale()
+        self.scales = sorted(scales, key=lambda scale: abs(scale - display_scale))
+        self.best_scale = None  # Scale of the last match, tried first next time
+
+        self.templates: dict = {}
+        for path in glob.glob(get_correct_path("*.png", template_directory)):
+            template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            self.templates[os.path.basename(path)] = {
+                scale: self._prepare(template, scale) for scale in self.scales
+            }
+
+    def _prepare(self, template: np.ndarray, scale: float) -> tuple:
+        """Return the template resized to scale, at full and at coarse resolution."""
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            template = cv2.resize(
+                template, None, fx=scale, fy=scale, interpolation=interpolation
+            )
+        coarse = template
+        for _ in range(self.levels):
+            coarse = cv2.pyrDown(coarse)
+        return template, coarse
+
+    def match(self, image_name: str, region: tuple | None = None) -> Match | None:
+        """Find image_name on screen, optionally only within region (left, top, width, height)."""
+        region_left, region_top = region[:2] if region else (0, 0)
+        screen = cv2.cvtColor(
+            np.asarray(pyautogui.screenshot(region=region)), cv2.COLOR_RGB2GRAY
+        )
+        coarse_screen = screen
+        for _ in range(self.levels):
+            coarse_screen = cv2.pyrDown(coarse_screen)
+
+        scales = self.scales
+        if self.best_scale is not None:
+            scales = [self.best_scale] + [s for s in scales if s != self.best_scale]
+
+        # Coarse search over all scales on the downscaled screenshot
+        best = None
+        for scale in scales:
+            _, coarse = self.templates[image_name][scale]
+            if (
+                coarse.shape[0] > coarse_screen.shape[0]
+                or coarse.shape[1] > coarse_screen.shape[1]
+            ):
+                continue
+            result = cv2.matchTemplate(coarse_screen, coarse, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(result)
+            if best is None or score > best[0]:
+                best = (score, scale, location)
+            # A confident hit at the scale that matched last time is good enough
+            if scale == self.best_scale and score >= self.threshold:
+                break
+        if best is None:
+            return None
+
+        # Refine at full resolution in a small window around the coarse hit
+        _, scale, (x, y) = best
+        template, _ = self.templates[image_name][scale]
+        height, width = template.shape
+        factor = 2**self.levels
+        padding = 2 * factor
+        window_left = max(0, x * factor - padding)
+        window_top = max(0, y * factor - padding)
+        window = screen[
+            window_top : window_top + height + 2 * padding,
+            window_left : window_left + width + 2 * padding,
+        ]
+        if window.shape[0] < height or window.shape[1] < width:
+            return None
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+        if score < self.threshold:
+            return None
+
+        self.best_scale = scale
+        return Match(
+            region_left + window_left + dx,
+            region_top + window_top + dy,
+            width,
+            height,
+            scale,
+            score,
+        )
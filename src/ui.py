@@ -1,5 +1,5 @@
+import importlib
 import sys
-import os
 
 from textual.app import ComposeResult
 from textual.containers import HorizontalGroup, VerticalGroup, VerticalScroll, Grid
@@ -8,6 +8,7 @@ from textual.reactive import reactive
 from textual.screen import ModalScreen
 from textual.widgets import (
     Button,
+    DataTable,
     Footer,
     Label,
     Link,
@@ -25,54 +26,88 @@ from textual.widgets import (
 import subprocess
 from textual import log
 
-from rich.table import Table
 from textual.binding import Binding, BindingType
 
+from textual.coordinate import Coordinate
 from textual.widgets.option_list import Option
 from textual.widgets.selection_list import Selection
 
 import config
 
-import threading
-
 from textual.app import App
 
+from event_log import event_log
+from session import apply_schedule_settings, get_schedule_settings
 from utils import load_settings, save_settings
 from collections import OrderedDict
 
-import datetime
-
-
-class MeasurementSchedule(Static):
-    """A list of measurement steps."""
-
-    def populate_table(self) -> None:
-        """Populate the table with the measurement steps."""
-        self.table = None
-        self.table = Table(title="Measurement Schedule", expand=True)
-        # self.step_count = 1
-        self.table.add_column("Step", no_wrap=True)
-        self.table.add_column("Description", style="cyan", no_wrap=True)
-        self.table.add_column("Channel", no_wrap=True)
-        self.table.add_column("Audio played", no_wrap=True)
-        self.table.add_column("Iteration", no_wrap=True)
-        self.table.add_column("Position", no_wrap=True)
-        self.table.add_column("Status", no_wrap=True)
-
-        log.debug(f"initial table: {self.table}")
-
-        for index, step in enumerate(config.measurement_schedule):
-            self.table.add_row(
-                f"#{index + 1}",
-                step["Description"],
-                step["Channel"],
-                step["Audio played"],
-                step["Iteration"],
-                step["Position"],
-                step["Status"],
+import time
+
+
+_last_debug_log: dict = {}
+
+
+def log_debug(message: str, *args, rate_limit: float = 0.0):
+    """Send a debug message to the devtools console when debug logging is enabled.
+
+    The message is only formatted (%-style with args) in the debug profile. High-volume
+    sites pass rate_limit to log at most once per that many seconds.
+    """
+    if not config.debug_logging:
+        return
+    if rate_limit:
+        now = time.monotonic()
+        if now - _last_debug_log.get(message, -rate_limit) < rate_limit:
+            return
+        _last_debug_log[message] = now
+    log.debug(message % args if args else message)
+
+
+class MeasurementSchedule(DataTable):
+    """A list of measurement steps.
+
+    Only the rows that changed since the last update are redrawn, and the table
+    only renders the rows that are scrolled into view.
+    """
+
+    COLUMNS = (
+        "Step",
+        "Description",
+        "Channel",
+        "Audio played",
+        "Iteration",
+        "Position",
+        "Status",
+    )
+
+    can_focus = False
+
+    def populate_table(self, rebuild: list | None, rows: dict) -> None:
+        """Update the table with the measurement steps sent by the session.
+
+        rebuild holds every row when steps were added or removed, otherwise rows
+        holds just the rows that changed, keyed by their index.
+        """
+        if not self.columns:
+            self.add_columns(*self.COLUMNS)
+
+        if rebuild is not None:
+            self.clear()
+            self.add_rows(rebuild)
+            log_debug(
+                "Schedule table rebuilt with %d steps",
+                self.row_count,
+                rate_limit=config.DEBUG_LOG_RATE_LIMIT,
             )
-        self.update(self.table)
-        log.debug(f"self.table: {self.table}")
+            return
+
+        for index, row in rows.items():
+            if index >= self.row_count:
+                continue
+            for column, value in enumerate(row):
+                coordinate = Coordinate(index, column)
+                if self.get_cell_at(coordinate) != value:
+                    self.update_cell_at(coordinate, value)
 
 
 class ChannelSelector(VerticalGroup):
@@ -159,6 +194,7 @@ class DefaultScreen(Screen):
                 )
                 yield Button(label="Setup", id="configure", variant="default")
                 yield Button(label="Load settings", id="load", variant="default")
+                yield Button(label="Full log", id="log", variant="default")
                 if "--noservebtn" not in sys.argv:
                     yield Button(label="Serve remotely", id="serve", variant="default")
             with VerticalGroup(id="Overview"):
@@ -214,10 +250,21 @@ class DefaultScreen(Screen):
                                 type="text",
                                 disabled=True,
                             )
-                with VerticalScroll(id="ScheduleArea"):
-                    yield MeasurementSchedule(id="MeasurementSchedule")
+                with VerticalGroup(id="ScheduleArea"):
+                    yield Label(
+                        "Measurement schedule", id="ScheduleLabel", variant="primary"
+                    )
+                    yield MeasurementSchedule(
+                        id="MeasurementSchedule", cursor_type="none", zebra_stripes=True
+                    )
         with HorizontalGroup(id="Info"):
-            yield RichLog(id="ConsoleLog", auto_scroll=True, markup=True, wrap=True)
+            yield RichLog(
+                id="ConsoleLog",
+                auto_scroll=True,
+                markup=True,
+                wrap=True,
+                max_lines=config.CONSOLE_MAX_LINES,
+            )
         yield Footer(id="Footer", show_command_palette=False)
 
 
@@ -260,6 +307,29 @@ class InfoScreen(Screen):
         yield Footer(id="Footer", show_command_palette=False)
 
 
+class LogScreen(Screen):
+    # The session log read back from disk, for scrolling past what the console keeps
+    BINDINGS: list[BindingType] = [
+        Binding(
+            "q", "app.quit_safely", "Quit the application", show=True, priority=True
+        ),
+    ]
+
+    def compose(self) -> ComposeResult:
+        with HorizontalGroup(id="LogMainArea"):
+            with VerticalGroup(id="Commands"):
+                yield Button(label="Back", id="back", variant="default")
+            yield RichLog(id="HistoryLog", markup=True, wrap=True)
+        yield Footer(id="Footer", show_command_palette=False)
+
+    def on_screen_resume(self) -> None:
+        history_log = self.query_one("#HistoryLog", RichLog)
+        history_log.clear()
+        history_log.write(
+            "\n".join(event_log.read_messages(limit=config.LOG_SCROLLBACK_LINES))
+        )
+
+
 class ConfigScreen(Screen):
     # A channel mapping configuration screen
     BINDINGS: list[BindingType] = [
@@ -316,25 +386,27 @@ class AutoSweepApp(App):
         "ServeScreen": ServeScreen,
         "ConfigScreen": ConfigScreen,
         "InfoScreen": InfoScreen,
+        "LogScreen": LogScreen,
     }
 
     ENABLE_COMMAND_PALETTE = False
 
+    # Served apps are thin viewers of the session hosted by another process
+    is_viewer = "--viewer" in sys.argv
+
     async def on_mount(self) -> None:
         self.title = "Automated Sweeps"
         self.sub_title = "Tool for automating REW measurements"
-        await self.push_screen(DefaultScreen())
+        self.default_screen = DefaultScreen()
+        await self.push_screen(self.default_screen)
         self.theme = "nord"
 
         self.selected_channel = None
+        self.serve_process = None
 
-        self.generate_measurement_schedule()
-
-        # Update measurement schedule
         self.measurement_schedule = self.query_one(
             "#MeasurementSchedule", MeasurementSchedule
         )
-        self.measurement_schedule.populate_table()
 
         # Write welcome message
         self.main_console = self.query_one("#ConsoleLog", RichLog)
@@ -346,66 +418,138 @@ class AutoSweepApp(App):
             "Please check the instructions for more information on how to use this program."
         )
 
-    def generate_measurement_schedule(self):
-        """Generates the measurement schedule based on the current configuration."""
-
-        # Clear the measurement schedule
-        config.measurement_schedule.clear()
-
-        # We always need the check settings step
-        check_settings = {
-            "Description": "Check REW settings",
-            "Channel": "---",
-            "Audio played": "---",
-            "Iteration": "Utility",
-            "Position": "---",
-            "Status": "Not started",
-        }
-
-        config.measurement_schedule.append(check_settings)
-
-        if config.measure_mic_position:
-            check_mic_schedule = [
-                {
-                    "Description": "Measure distance",
-                    "Channel": "FL",
-                    "Audio played": "FL",
-                    "Iteration": "Utility",
-                    "Position": "Reference",
-                    "Status": "Not started",
-                },
-                {
-                    "Description": "Measure distance",
-                    "Channel": "FR",
-                    "Audio played": "FR",
-                    "Iteration": "Utility",
-                    "Position": "Reference",
-                    "Status": "Not started",
-                },
-                {
-                    "Description": "Check microphone position",
-                    "Channel": "---",
-                    "Audio played": "---",
-                    "Iteration": "Utility",
-                    "Position": "Reference",
-                    "Status": "Not started",
-                },
+        # Attach to the measurement session, which starts with a snapshot of it
+        self.viewer = self.attach_viewer()
+        self.drain_messages()
+
+        if "--benchmark-startup" in sys.argv:
+            # Report when the first frame was drawn and quit
+            self.call_after_refresh(self.exit_after_first_frame)
+        elif not self.is_viewer:
+            # Load the automation stack in the background once the first frame is drawn
+            self.call_after_refresh(
+                self.run_worker, self.warm_up, thread=True, exit_on_error=False
+            )
+
+        # Apply the changes of the measurement session once per frame
+        self.set_interval(config.MESSAGE_DRAIN_INTERVAL, self.drain_messages)
+
+    def attach_viewer(self):
+        """Attaches to the session in this process, or to the engine host when a viewer."""
+        if not self.is_viewer:
+            from session import get_session
+
+            return get_session().attach()
+
+        from engine_host import RemoteViewer
+
+        try:
+            return RemoteViewer.from_environment()
+        except (ConnectionError, OSError) as e:
+            self.main_console.write(
+                f"{config.PRINTFORMAT['ERROR']} Could not attach to the measurement engine: {e}"
+            )
+            return None
+
+    def warm_up(self):
+        """Imports the automation modules and starts VLC so the first sweep starts without delay."""
+        from audio import get_playback_engine
+
+        importlib.import_module("process")
+
+        get_playback_engine()
+
+        if config.MEASUREMENT_DRIVER != "api":
+            importlib.import_module("gui_automation")
+
+    def exit_after_first_frame(self):
+        self.first_frame_time = time.time()
+        self.exit()
+
+    def drain_messages(self):
+        """Applies the changes sent by the measurement session to the UI."""
+        if self.is_viewer:
+            # Lines logged by this process, the session sends its own with the batches
+            lines = event_log.take_messages()
+            if lines:
+                self.main_console.write("\n".join(lines))
+
+        if self.viewer is None:
+            return
+        for batch in self.viewer.take_batches():
+            self.apply_batch(batch)
+
+    def apply_batch(self, batch: dict):
+        """Applies one batch of session changes."""
+        if "messages" in batch:
+            self.main_console.write("\n".join(batch["messages"]))
+
+        if "rebuild" in batch or "rows" in batch:
+            self.measurement_schedule.populate_table(
+                batch.get("rebuild"), batch.get("rows", {})
+            )
+
+        if "settings" in batch:
+            self.show_settings(batch["settings"])
+
+        if "state" in batch:
+            self.show_state(batch["state"])
+
+        if "prompt" in batch:
+            self.show_prompt(batch["prompt"])
+
+    def show_settings(self, settings: dict):
+        """Shows the schedule settings in use, which may have been changed by another viewer."""
+        if self.is_viewer:
+            apply_schedule_settings(settings)
+
+        # Changing the fields here must not send the settings back to the session
+        with self.prevent(Switch.Changed, Input.Submitted):
+            self.default_screen.query_one("#reference", Switch).value = settings[
+                "reference"
             ]
+            centering_switch = self.default_screen.query_one("#centering", Switch)
+            centering_switch.value = settings["mic_position"]
+            centering_switch.disabled = not settings["reference"]
 
-            config.measurement_schedule.extend(check_mic_schedule)
-        for i in range(config.measure_iterations):
-            for channel, mapping in config.selected_channels.items():
-                step = {
-                    "Description": "Measure sweep",
-                    "Channel": channel,
-                    "Audio played": mapping["audio"],
-                    "Iteration": "Reference"
-                    if config.measure_reference and i == 0
-                    else f"{i + 1}",
-                    "Position": config.measure_position_name,
-                    "Status": "Not started",
-                }
-                config.measurement_schedule.append(step)
+            self.default_screen.query_one("#iterations", Input).value = str(
+                settings["iterations"]
+            )
+            position_input = self.default_screen.query_one("#position", Input)
+            position_input.value = settings["position_name"]
+            position_input.disabled = settings["reference"]
+
+    def show_state(self, state: str):
+        """Sets the start and stop buttons to the state of the session."""
+        start_button = self.default_screen.query_one("#start", Button)
+        stop_button = self.default_screen.query_one("#stop", Button)
+
+        if state == "running":
+            start_button.variant = "warning"
+            start_button.label = "Pause measurement"
+        elif state == "paused":
+            start_button.variant = "success"
+            start_button.label = "Resume"
+        else:
+            start_button.variant = "success"
+            start_button.label = "Start measurement"
+        stop_button.disabled = state == "idle"
+
+    def show_prompt(self, prompt: str | None):
+        """Shows the question of the session, or closes it once another viewer answered it."""
+        if prompt is not None and not isinstance(self.screen, InputScreen):
+            self.push_screen(InputScreen(prompt))
+        elif prompt is None and isinstance(self.screen, InputScreen):
+            self.pop_screen()
+
+    def send(self, command: str, *args):
+        """Sends a command to the measurement session."""
+        if self.viewer is not None:
+            self.viewer.send(command, *args)
+
+    def generate_measurement_schedule(self):
+        """Sends the current configuration to the session, which updates the schedule."""
+        self.send("configure", get_schedule_settings())
 
     def on_selection_list_selected_changed(
         self, message: SelectionList.SelectedChanged
@@ -415,7 +559,9 @@ class AutoSweepApp(App):
         config.selected_channels.clear()
 
         for item in message.selection_list.selected:
-            log.debug(f"Selected option: {item}")
+            log_debug(
+                "Selected option: %s", item, rate_limit=config.DEBUG_LOG_RATE_LIMIT
+            )
             for ch in item.split("/"):
                 config.selected_channels[ch] = {"audio": ch, "status": "Not started"}
 
@@ -430,7 +576,7 @@ class AutoSweepApp(App):
         config.selected_channels.clear()
         config.selected_channels.update(sorted_selected_channels)
 
-        log.debug(f"Selected options: {config.selected_channels}")
+        log_debug("Selected options: %s", config.selected_channels)
 
         self.channels_list = self.query_one(ChannelList)
         self.channels_list.refresh(recompose=True, layout=True)
@@ -450,8 +596,11 @@ class AutoSweepApp(App):
         # Check if a mapping exists for the option_id
         mapped_option = config.selected_channels[message.option_id]["audio"]
 
-        log.debug(
-            f"Highlighted option: {message.option_id} (Mapped to: {mapped_option})"
+        log_debug(
+            "Highlighted option: %s (Mapped to: %s)",
+            message.option_id,
+            mapped_option,
+            rate_limit=config.DEBUG_LOG_RATE_LIMIT,
         )
 
         # Use the mapped option_id to select the corresponding radio button
@@ -470,7 +619,7 @@ class AutoSweepApp(App):
         if original_channel and new_mapping:
             # Update or create the mapping in config.channel_mapping
             config.selected_channels[original_channel]["audio"] = new_mapping
-            log.debug(f"Mapping updated: {original_channel} -> {new_mapping}")
+            log_debug("Mapping updated: %s -> %s", original_channel, new_mapping)
         else:
             log.warning("Either original channel or new mapping is missing.")
 
@@ -479,7 +628,7 @@ class AutoSweepApp(App):
 
     def on_switch_changed(self, event: Switch.Changed) -> None:
         """Handle changes in the switch."""
-        log.debug(f"Switch changed: {event.switch.id} -> {event.switch.value}")
+        log_debug("Switch changed: %s -> %s", event.switch.id, event.switch.value)
 
         self.switch_value = event.switch.value
 
@@ -505,12 +654,9 @@ class AutoSweepApp(App):
         # Update measurement schedule
         self.generate_measurement_schedule()
 
-        # Refresh measurement table
-        self.measurement_schedule.populate_table()
-
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle changes in the input field."""
-        log.debug(f"Input submitted: {event.input.id} -> {event.input.value}")
+        log_debug("Input submitted: %s -> %s", event.input.id, event.input.value)
 
         if event.input.id == "position":
             config.measure_position_name = event.input.value
@@ -521,9 +667,6 @@ class AutoSweepApp(App):
         # Update measurement schedule
         self.generate_measurement_schedule()
 
-        # Refresh measurement table
-        self.measurement_schedule.populate_table()
-
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle measurement commands selected from the UI."""
 
@@ -542,54 +685,26 @@ class AutoSweepApp(App):
             self.settings = load_settings()
             if self.settings:
                 config.selected_channels = self.settings
-                log.debug(f"Loaded settings: {config.selected_channels}")
+                log_debug("Loaded settings: %s", config.selected_channels)
 
                 # Update measurement schedule
                 self.generate_measurement_schedule()
-
-                # Refresh measurement table
-                self.measurement_schedule.populate_table()
-            log.info("No settings file found.")
+            else:
+                log.info("No settings file found.")
 
         elif event.button.id == "start":
-            self.start_button = self.query_one("#start", Button)
-            self.stop_button = self.query_one("#stop", Button)
-
-            # Enable stop button
-            self.stop_button.disabled = False
-
-            # if button is green it must be started
+            # If button is green it must be started or resumed, if yellow paused.
+            # The buttons follow the state the session reports back.
             if event.button.variant == "success":
-                # Run measurement in a background worker
-                self.start_measurement_schedule()
-
-                # Set button to pause
-                self.start_button.variant = "warning"
-                self.start_button.label = "Pause measurement"
-
-            # If button is yellow it must be paused
+                self.send("start")
             elif event.button.variant == "warning":
-                # Pause measurement schedule
                 self.action_pause_measurement_schedule()
 
-                # Set button to resume
-                self.start_button.variant = "success"
-                self.start_button.label = "Resume"
-
         elif event.button.id == "stop":
-            self.stop_button = self.query_one("#stop", Button)
-
-            # Disable stop button
-            self.stop_button.disabled = True
-
-            self.start_button = self.query_one("#start", Button)
-            self.start_button.variant = "success"
-            self.start_button.label = "Start measurement"
-
             self.action_stop_measurement_schedule()
 
         elif event.button.id == "proceed":
-            self.start_measurement_schedule()
+            self.send("answer", True)
 
         elif event.button.id == "back":
             await self.pop_screen()
@@ -597,27 +712,10 @@ class AutoSweepApp(App):
             # Update measurement schedule
             self.generate_measurement_schedule()
 
-            # Refresh measurement table
-            self.measurement_schedule.populate_table()
-
         elif event.button.id == "serve":
-            self.main_console = self.query_one("#ConsoleLog", RichLog)
-            self.main_console.write(
-                f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['INFO']} Starting server..."
-            )
-            # self.app_event_loop = asyncio.get_event_loop()
-            # await self.app_event_loop.stop()
-            self.exit()
-            # Clear the terminal (cross-platform)
-            os.system("cls || clear")
-            print()
-
-            if getattr(sys, "frozen", False):  # Running as an executable
-                subprocess.run(["AutomatedSweeps.exe", "--serve"])
-            else:  # Running as a Python script
-                subprocess.run(
-                    ["uv", "run", "textual", "run", "--dev", "src/main.py", "--serve"]
-                )
+            self.start_serving()
+            event.button.disabled = True
+            event.button.label = "Serving remotely"
 
         elif event.button.id == "quit":
             await self.action_quit_safely()
@@ -628,148 +726,70 @@ class AutoSweepApp(App):
         elif event.button.id == "info":
             await self.push_screen("InfoScreen")
 
-    def start_measurement_schedule(self):
-        """Runs the measurement schedule in a worker thread."""
-
-        # If a worker is running, resume it
-        if hasattr(self, "worker") and self.worker is not None:
-            self.pause_event.set()  # Unpause the worker
-            self.main_console.write(
-                f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['INFO']} Resuming measurement schedule..."
-            )
-            return  # Exit, no need to start a new one
-
-        self.main_console.write(
-            f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['INFO']} [green]Starting measurement schedule...[/green]"
+        elif event.button.id == "log":
+            await self.push_screen("LogScreen")
+
+    def start_serving(self):
+        """Serves viewers of this session on the local network from a background server."""
+        from engine_host import engine_host
+        from session import get_session
+        from utils import get_ip
+        from web_api import web_api
+
+        # The server and its viewer processes find the session through the environment
+        engine_host.start(get_session())
+        api_url = web_api.start(get_session(), get_ip())
+
+        # The server keeps the logging profile, devtools only attach in debug
+        debug_flags = ["--debug"] if config.debug_logging else []
+        if getattr(sys, "frozen", False):  # Running as an executable
+            command = ["AutomatedSweeps.exe", "--serve", "--attach", *debug_flags]
+        else:  # Running as a Python script
+            dev_flags = ["--dev"] if config.debug_logging else []
+            command = [
+                "uv",
+                "run",
+                "textual",
+                "run",
+                *dev_flags,
+                "src/main.py",
+                "--serve",
+                "--attach",
+                *debug_flags,
+            ]
+        # The server must not write over this terminal
+        self.serve_process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
         )
-
-        self.stop_event = threading.Event()  # Used to stop the thread
-        self.pause_event = threading.Event()  # Used to pause execution
-        self.pause_event.set()  # Start as unpaused
-
-        # Define a thread-safe UI writer function
-        # Initialize NotifyUI instance
-        self.message_ui = MessageUI(
-            self.main_console,
-            self.measurement_schedule,
-            self.action_wait_input_measurement_schedule,
-            self.action_complete_measurement_schedule,
-            self.call_from_thread,
+        event_log.emit(
+            "message",
+            message=f"{config.PRINTFORMAT['INFO']} Serving the app at http://{get_ip()}:{config.SERVE_PORT}. Open it on another device to control the measurement remotely.",
         )
-
-        # Run the workflow as a background task
-        from process import run_workflow
-
-        self.worker = self.run_worker(
-            lambda: run_workflow(self.message_ui, self.pause_event, self.stop_event),
-            thread=True,
-            exclusive=True,
+        event_log.emit(
+            "message",
+            message=f"{config.PRINTFORMAT['INFO']} Lightweight control page and JSON API at {api_url} (keep the token private)",
         )
 
     def action_stop_measurement_schedule(self):
         """Stops the measurement schedule."""
-
-        self.main_console.write("[red]Stopping measurement schedule...[/red]")
-        if hasattr(self, "stop_event") and hasattr(self, "pause_event"):
-            self.stop_event.set()  # Tell the thread to exit
-            self.pause_event.set()  # Unpause to allow clean exit
-
-        # Wait for worker thread to finish
-        if hasattr(self, "worker") and self.worker is not None:
-            self.worker.cancel()  # Ensure the worker is fully stopped
-            self.worker = None  # Reset worker to allow restart
-
-        # Clear the measurement schedule
-        self.generate_measurement_schedule()
-
-        # Refresh measurement table
-        self.measurement_schedule.populate_table()
+        self.send("stop")
 
     def action_pause_measurement_schedule(self):
         """Pauses the measurement schedule."""
-        self.main_console.write(
-            f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['INFO']} [yellow]Pausing measurement schedule...[/yellow]"
-        )
-        self.pause_event.clear()
-
-    def action_wait_input_measurement_schedule(self, input: str) -> None:
-        """Waits for input from the user to continue the measurement schedule."""
-
-        # Pause the measurement schedule by clearing the pause event
-        self.action_pause_measurement_schedule()
-
-        self.push_screen(InputScreen(input))
-
-    def action_complete_measurement_schedule(self):
-        """Completes the measurement schedule."""
-
-        self.main_console.write(
-            f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['INFO']} [green]Completed measurement schedule.[/green]"
-        )
-        if hasattr(self, "stop_event") and hasattr(self, "pause_event"):
-            self.stop_event.set()  # Tell the thread to exit
-            self.pause_event.set()  # Unpause to allow clean exit
-
-        # Wait for worker thread to finish
-        if hasattr(self, "worker") and self.worker is not None:
-            self.worker.cancel()  # Ensure the worker is fully stopped
-            self.worker = None  # Reset worker to allow restart
-
-        # Set buttons to default state
-        self.stop_button = self.query_one("#stop", Button)
-
-        # Disable stop button
-        self.stop_button.disabled = True
-
-        self.start_button = self.query_one("#start", Button)
-        self.start_button.variant = "success"
-        self.start_button.label = "Start measurement"
+        self.send("pause")
 
     async def action_quit_safely(self):
         """Quits the application."""
-        self.main_console.write(
-            f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {config.PRINTFORMAT['WARNING']} Quitting safely..."
+        event_log.emit(
+            "message",
+            message=f"{config.PRINTFORMAT['WARNING']} Quitting safely...",
         )
 
-        self.action_stop_measurement_schedule()
-        # Check if worker exists and cancel it
-        if hasattr(self, "worker") and self.worker is not None:
-            self.worker.cancel()
+        # Viewers leave the shared session running, the app hosting it stops it
+        if not self.is_viewer:
+            self.action_stop_measurement_schedule()
+            if self.serve_process is not None:
+                self.serve_process.terminate()
+        if self.viewer is not None:
+            self.viewer.close()
         await self.action_quit()
-
-
-class MessageUI:
-    def __init__(
-        self,
-        main_console: RichLog,
-        measurement_schedule: MeasurementSchedule,
-        action_wait_input_measurement_schedule,
-        action_complete_measurement_schedule,
-        call_from_thread,
-    ):
-        self.main_console = main_console
-        self.measurement_schedule = measurement_schedule
-        self.action_wait_input_measurement_schedule = (
-            action_wait_input_measurement_schedule
-        )
-        self.action_complete_measurement_schedule = action_complete_measurement_schedule
-        self.call_from_thread = call_from_thread
-
-    def info(self, contents: str):
-        """Send an informational message to the UI."""
-        _timestamped_contents = (
-            f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {contents}"
-        )
-        self.call_from_thread(self.main_console.write, _timestamped_contents)
-
-    def update(self):
-        """Trigger a UI update for the measurement schedule."""
-        self.call_from_thread(self.measurement_schedule.populate_table)
-
-    def input(self, contents: str):
-        """Indicate that input is required from the user."""
-        self.call_from_thread(self.action_wait_input_measurement_schedule, contents)
-
-    def complete(self):
-        """Indicate that the measurement schedule is complete."""
-        self.call_from_thread(self.action_complete_measurement_schedule)
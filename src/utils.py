@@ -1,28 +1,34 @@
 import json
 import os
 import socket
-from rew_api import get_measurement_summary
 import sys
+import time
 from threading import Event
 
-from config import SETTINGS_FILE
+from config import PRINTFORMAT, SETTINGS_FILE
+from event_log import event_log
 
 
 def save_settings(settings):
     """Save user settings to a JSON file."""
     with open(SETTINGS_FILE, "w") as f:
         json.dump(settings, f)
-    print("Settings saved successfully.")
+    event_log.emit(
+        "settings_saved", message=f"{PRINTFORMAT['OK']} Settings saved successfully."
+    )
 
 
-def load_settings():
+def load_settings(path: str = SETTINGS_FILE):
     """Load settings from a JSON file if available and valid."""
-    if os.path.exists(SETTINGS_FILE):
+    if os.path.exists(path):
         try:
-            with open(SETTINGS_FILE, "r") as f:
+            with open(path, "r") as f:
                 return json.load(f)
         except json.JSONDecodeError:
-            print("Warning: Settings file is corrupted. Ignoring it.")
+            event_log.emit(
+                "settings_corrupted",
+                message=f"{PRINTFORMAT['WARNING']} Settings file is corrupted. Ignoring it.",
+            )
     return None
 
 
@@ -61,15 +67,14 @@ def get_ip():
     return IP
 
 
-local_ip = get_ip()
-
-
 def get_microphone_distance(
     fr_uuid: str,
     fl_uuid: str,
 ) -> int:
     """Get the distance in cm needed to move the microphone to align the IR peaks of the FR and FL measurements.
     A negative number means it needs to move to the right speaker, and a positive number means it needs to move to the left speaker."""
+    from rew_api import get_measurement_summary
+
     # Get the time of the IR peak for the FR measurement
     fr_data = get_measurement_summary(fr_uuid)
 
@@ -111,14 +116,68 @@ def get_correct_path(path, directory):
     return os.path.join(base_path, path)
 
 
-def check_control_events(pause_event: Event, stop_event: Event, message_ui):
-    """Checks stop and pause events. Returns True if the loop should break, False otherwise."""
-    if stop_event.is_set():
-        return True  # Indicate that the caller should break out of its loop
+class CancelToken:
+    """Pause and stop control shared by the UI and the measurement workflow.
 
-    if not pause_event.is_set():  # Wait while paused
-        pause_event.wait()  # Waiting until the pause event is set
-        if stop_event.is_set():
+    Every wait in the workflow goes through the token, so a stop or pause requested
+    from the UI interrupts playback and sleeps immediately instead of after the sweep.
+    """
+
+    def __init__(self):
+        self._stop_event = Event()  # Used to stop the thread
+        self._resume_event = Event()  # Cleared while paused
+        self._resume_event.set()  # Start as unpaused
+        self._interrupt_event = Event()  # Set while stopped or paused, wakes up sleeps
+        self._stop_requested_at = None
+        self.stop_latency = None  # Seconds between stop() and the workflow returning
+
+    def stop(self):
+        """Request the workflow to stop."""
+        self._stop_requested_at = time.perf_counter()
+        self._stop_event.set()
+        self._interrupt_event.set()
+        self._resume_event.set()  # Unpause to allow clean exit
+
+    def pause(self):
+        """Request the workflow to pause."""
+        self._resume_event.clear()
+        self._interrupt_event.set()
+
+    def resume(self):
+        """Resume a paused workflow."""
+        if not self._stop_event.is_set():
+            self._interrupt_event.clear()
+        self._resume_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def record_stop_latency(self) -> float | None:
+        """Set stop_latency once the workflow has stopped, including its cleanup."""
+        if self.stop_latency is None and self._stop_requested_at is not None:
+            self.stop_latency = time.perf_counter() - self._stop_requested_at
+        return self.stop_latency
+
+    @property
+    def paused(self) -> bool:
+        return not self._resume_event.is_set()
+
+    def wait_while_paused(self) -> bool:
+        """Block while paused. Returns True if the caller should stop."""
+        self._resume_event.wait()
+        return self.stopped
+
+    def check(self) -> bool:
+        """Checks stop and pause requests. Returns True if the loop should break, False otherwise."""
+        if self.stopped:
             return True  # Indicate that the caller should break out of its loop
 
-    return False  # Indicate that the loop can continue
+        if self.paused:  # Wait while paused
+            return self.wait_while_paused()
+
+        return False  # Indicate that the loop can continue
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep for up to seconds. Returns True if interrupted by a stop or pause."""
+        return self._interrupt_event.wait(seconds)
@@ -0,0 +1,291 @@
+import asyncio
+import hmac
+import json
+import secrets
+import threading
+from collections import deque
+
+from aiohttp import WSMsgType, web
+import config
+from event_log import to_plain
+
+COLUMNS = ("Description", "Channel", "Audio played", "Iteration", "Position", "Status")
+
+
+def validate_command(command, args) -> tuple:
+    """Check a command sent to the API. Raises ValueError when it is invalid."""
+    from session import MeasurementSession, validate_schedule_settings
+
+    if command not in MeasurementSession.COMMANDS:
+        raise ValueError(f"Unknown command: {command}")
+    if not isinstance(args, list):
+        raise ValueError("args must be a list")
+    if command == "answer" and (len(args) != 1 or not isinstance(args[0], bool)):
+        raise ValueError("answer takes one boolean: true to proceed, false to abort")
+    if command == "configure":
+        if len(args) != 1:
+            raise ValueError("configure takes one settings object")
+        validate_schedule_settings(args[0])
+    return command, args
+
+
+class WebApi:
+    """Local HTTP and WebSocket API for the measurement session.
+
+    GET /api/state returns the whole session as JSON. /api/events is a WebSocket
+    that starts with the same snapshot and then sends only what changed: single
+    schedule cells, new console lines and state changes. Commands (start, pause,
+    stop, answer, configure) are accepted on the WebSocket and with POST
+    /api/command. GET / serves a minimal page for phones.
+
+    The API is reachable from the whole network, so every call needs the token
+    in the URL returned by start(), and requests that a page on another origin
+    sent from a browser are refused.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.viewer = None
+        self.rows: list[list] = []
+        self.status: dict = {"settings": None, "state": "idle", "prompt": None}
+        self._messages = deque(maxlen=config.CONSOLE_MAX_LINES)
+        self._sockets: set = set()
+        self._thread: threading.Thread | None = None
+        self.token = secrets.token_urlsafe(16)
+
+    def start(self, session, host: str, port: int = config.API_PORT) -> str:
+        """Serve the API on a background thread with its own event loop.
+
+        Returns the URL of the page for phones, including the access token.
+        """
+        url = f"http://{host}:{port}/?token={self.token}"
+        if self._thread is not None:
+            return url
+
+        self.session = session
+        self.viewer = session.attach()
+        self._thread = threading.Thread(
+            target=self._run, args=(host, port), name="web-api", daemon=True
+        )
+        self._thread.start()
+        return url
+
+    def _run(self, host: str, port: int):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self._serve(host, port))
+        loop.run_forever()
+
+    async def _serve(self, host: str, port: int):
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/", self.get_page),
+                web.get("/api/state", self.get_state),
+                web.post("/api/command", self.post_command),
+                web.get("/api/events", self.get_events),
+            ]
+        )
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        asyncio.get_running_loop().create_task(self._pump())
+
+    async def _pump(self):
+        """Turn the session batches into deltas and send them to every WebSocket."""
+        while True:
+            await asyncio.sleep(config.MESSAGE_DRAIN_INTERVAL)
+            for batch in self.viewer.take_batches():
+                delta = self.apply_batch(batch)
+                if not delta or not self._sockets:
+                    continue
+                if batch.get("snapshot"):
+                    # The session resent everything, so the clients start over too
+                    delta = self.get_snapshot()
+                else:
+                    delta = {"type": "delta", **delta}
+                data = json.dumps(delta, separators=(",", ":"))
+                for socket in list(self._sockets):
+                    try:
+                        await socket.send_str(data)
+                    except ConnectionError:
+                        self._sockets.discard(socket)
+
+    def apply_batch(self, batch: dict) -> dict:
+        """Update the state kept for new clients and return what changed."""
+        delta = {}
+
+        if "rebuild" in batch:
+            self.rows = [
+                [to_plain(cell) for cell in row[1:]] for row in batch["rebuild"]
+            ]
+            delta["rows"] = self.rows
+
+        cells = []
+        for index, row in batch.get("rows", {}).items():
+            if index >= len(self.rows):
+                continue
+            for column, cell in enumerate(row[1:]):
+                value = to_plain(cell)
+                if self.rows[index][column] != value:
+                    self.rows[index][column] = value
+                    cells.append([index, column, value])
+        if cells:
+            delta["cells"] = cells
+
+        if "messages" in batch:
+            lines = [to_plain(line) for line in batch["messages"]]
+            if batch.get("snapshot"):
+                # Snapshots repeat the history
+                self._messages.clear()
+            self._messages.extend(lines)
+            delta["messages"] = lines
+
+        for key in self.status:
+            if key in batch and batch[key] != self.status[key]:
+                self.status[key] = batch[key]
+                delta[key] = batch[key]
+        return delta
+
+    def get_snapshot(self) -> dict:
+        return {
+            "type": "snapshot",
+            "columns": COLUMNS,
+            "rows": self.rows,
+            "messages": list(self._messages),
+            **self.status,
+        }
+
+    def check_access(self, request: web.Request):
+        """Refuse requests without the token and requests from pages on other origins."""
+        token = request.query.get("token", "")
+        authorization = request.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            token = authorization.removeprefix("Bearer ")
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            raise web.HTTPUnauthorized(text="Missing or wrong token")
+
+        # Browsers send the origin of the page, which must be this server
+        origin = request.headers.get("Origin")
+        if origin is not None and origin != f"{request.scheme}://{request.host}":
+            raise web.HTTPForbidden(text="Requests from other origins are not allowed")
+
+    async def get_page(self, request: web.Request) -> web.Response:
+        # The page has no data of its own, it calls the API with the token in its URL
+        return web.Response(text=MOBILE_PAGE, content_type="text/html")
+
+    async def get_state(self, request: web.Request) -> web.Response:
+        self.check_access(request)
+        return web.json_response(self.get_snapshot())
+
+    async def post_command(self, request: web.Request) -> web.Response:
+        self.check_access(request)
+        if request.content_type != "application/json":
+            return web.json_response(
+                {"error": "Commands must be sent as application/json"}, status=415
+            )
+        try:
+            body = await request.json()
+            command, args = validate_command(body.get("command"), body.get("args", []))
+        except (ValueError, AttributeError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        self.session.handle(command, *args)
+        return web.json_response({"ok": True})
+
+    async def get_events(self, request: web.Request) -> web.WebSocketResponse:
+        self.check_access(request)
+        socket = web.WebSocketResponse(heartbeat=30)
+        await socket.prepare(request)
+        await socket.send_str(json.dumps(self.get_snapshot(), separators=(",", ":")))
+        self._sockets.add(socket)
+        try:
+            async for message in socket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    body = json.loads(message.data)
+                    command, args = validate_command(
+                        body.get("command"), body.get("args", [])
+                    )
+                except (ValueError, AttributeError) as e:
+                    await socket.send_str(
+                        json.dumps({"type": "error", "error": str(e)})
+                    )
+                    continue
+                self.session.handle(command, *args)
+        finally:
+            self._sockets.discard(socket)
+        return socket
+
+
+web_api = WebApi()
+
+
+# Minimal page to follow and control a session from a phone over the WebSocket API
+MOBILE_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Automated Sweeps</title>
+<style>
+body { font-family: sans-serif; margin: 0; padding: 8px; background: #2e3440; color: #eceff4; }
+button { font-size: 1.1em; padding: 10px; margin: 2px; border: 0; border-radius: 4px; }
+#start { background: #a3be8c; } #pause { background: #ebcb8b; } #stop { background: #bf616a; }
+#prompt { display: none; background: #4c566a; padding: 8px; margin: 8px 0; }
+#state { font-weight: bold; }
+table { width: 100%; border-collapse: collapse; font-size: 0.85em; }
+td { padding: 2px 4px; border-bottom: 1px solid #4c566a; }
+#log { height: 30vh; overflow-y: auto; font-family: monospace; font-size: 0.8em; white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<div>State: <span id="state">connecting</span></div>
+<div>
+<button id="start" onclick="send('start')">Start / resume</button>
+<button id="pause" onclick="send('pause')">Pause</button>
+<button id="stop" onclick="send('stop')">Stop</button>
+</div>
+<div id="prompt"><p id="question"></p>
+<button onclick="send('answer', [true])">OK</button>
+<button onclick="send('answer', [false])">Abort</button></div>
+<div id="log"></div>
+<table id="schedule"></table>
+<script>
+let socket;
+function send(command, args) { socket.send(JSON.stringify({command: command, args: args || []})); }
+function row(index, cells) {
+  const tr = document.createElement("tr");
+  for (const value of ["#" + (index + 1)].concat(cells)) { const td = document.createElement("td"); td.textContent = value; tr.appendChild(td); }
+  return tr;
+}
+function log(lines) {
+  const element = document.getElementById("log");
+  for (const line of lines) { const div = document.createElement("div"); div.textContent = line; element.appendChild(div); }
+  while (element.childNodes.length > 500) element.removeChild(element.firstChild);
+  element.scrollTop = element.scrollHeight;
+}
+function apply(event) {
+  const table = document.getElementById("schedule");
+  if (event.rows) { table.replaceChildren(...event.rows.map((cells, index) => row(index, cells))); }
+  for (const [index, column, value] of event.cells || []) { table.rows[index].cells[column + 1].textContent = value; }
+  if (event.type === "snapshot") document.getElementById("log").replaceChildren();
+  if (event.messages) log(event.messages);
+  if (event.state) document.getElementById("state").textContent = event.state;
+  if ("prompt" in event) {
+    document.getElementById("prompt").style.display = event.prompt ? "block" : "none";
+    document.getElementById("question").textContent = event.prompt || "";
+  }
+  if (event.error) log(["Error: " + event.error]);
+}
+function connect() {
+  const token = new URLSearchParams(location.search).get("token") || "";
+  socket = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/api/events?token=" + encodeURIComponent(token));
+  socket.onmessage = (message) => apply(JSON.parse(message.data));
+  socket.onclose = () => { document.getElementById("state").textContent = "disconnected"; setTimeout(connect, 2000); };
+}
+connect();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,192 @@
+"""Tests of the REW API client, the problem tracker and the caches, against the emulator."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import config  # noqa: E402
+from event_log import event_log  # noqa: E402
+from rew_api import (  # noqa: E402
+    MeasurementIndex,
+    ProblemTracker,
+    RewClient,
+    measurement_index,
+    rew_client,
+    summary_cache,
+    update_measurement,
+)
+from rew_emulator import RewEmulator  # noqa: E402
+
+log_directory = tempfile.TemporaryDirectory()
+event_log.path = str(Path(log_directory.name) / "session_events.jsonl")
+
+
+class EmulatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.emulator = RewEmulator(port=0)
+        self.url = self.emulator.start()
+        self.addCleanup(self.emulator.stop)
+        self.client = RewClient(self.url, backoff=0.001)
+
+    def add_warning(self, title: str, time: float):
+        self.emulator.warnings.append(
+            {"time": time, "title": title, "message": f"{title} message"}
+        )
+
+
+class RewClientTest(EmulatorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.emulator.failure_rate = 1.0  # Every request is answered with a 503
+
+    def get_stats(self, key: str) -> dict:
+        return self.client.get_stats()[key]
+
+    def test_idempotent_requests_are_retried(self):
+        with self.assertRaises(requests.HTTPError):
+            self.client.get(config.VERSION_ENDPOINT)
+
+        stats = self.get_stats(f"GET {config.VERSION_ENDPOINT}")
+        self.assertEqual(stats["calls"], config.REW_RETRIES + 1)
+        self.assertEqual(stats["retries"], config.REW_RETRIES)
+
+    def test_post_is_not_retried_by_default(self):
+        with self.assertRaises(requests.HTTPError):
+            self.client.post(config.MEASURE_ENDPOINT, json={"command": "Sweep"})
+
+        stats = self.get_stats(f"POST {config.MEASURE_ENDPOINT}")
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual(stats["retries"], 0)
+
+    def test_explicit_retries_apply_to_any_method(self):
+        with self.assertRaises(requests.HTTPError):
+            self.client.post(
+                config.MEASURE_ENDPOINT, json={"command": "Cancel"}, retries=1
+            )
+
+        self.assertEqual(self.get_stats(f"POST {config.MEASURE_ENDPOINT}")["calls"], 2)
+
+    def test_deadline_stops_the_retries(self):
+        self.emulator.latency = 0.2
+        with self.assertRaises(requests.RequestException):
+            self.client.get(config.VERSION_ENDPOINT, deadline=0.1)
+
+        self.assertEqual(self.get_stats(f"GET {config.VERSION_ENDPOINT}")["calls"], 1)
+
+    def test_client_errors_are_returned(self):
+        self.emulator.failure_rate = 0.0
+        response = self.client.get("/unknown")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.get_stats("GET /unknown")["retries"], 0)
+
+
+class ProblemTrackerTest(EmulatorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tracker = ProblemTracker(self.client)
+
+    def test_only_new_problems_are_reported(self):
+        self.add_warning("Old warning", 1.0)
+        self.tracker.mark()
+        self.add_warning("Input clipping", 2.0)
+        self.emulator.errors.append({"time": 3.0, "title": "Failed", "message": "x"})
+
+        problems = self.tracker.check()
+
+        self.assertEqual(
+            sorted((problem["source"], problem["title"]) for problem in problems),
+            [("error", "Failed"), ("warning", "Input clipping")],
+        )
+        self.assertEqual(
+            next(problem for problem in problems if problem["source"] == "warning")[
+                "type"
+            ],
+            "clipping",
+        )
+        self.assertEqual(self.tracker.check(), [])
+
+    def test_unchanged_lists_are_not_downloaded(self):
+        self.add_warning("Old warning", 1.0)
+        self.tracker.mark()
+        self.client.reset_stats()
+
+        self.assertEqual(self.tracker.check(), [])
+
+        stats = self.client.get_stats()
+        self.assertIn(f"GET {config.LAST_WARNING_ENDPOINT}", stats)
+        self.assertNotIn(f"GET {config.WARNING_ENDPOINT}", stats)
+
+    def test_unexpected_last_problem_falls_back_to_the_list(self):
+        self.add_warning("Old warning", 1.0)
+        self.tracker.mark()
+        self.add_warning("Input clipping", 2.0)
+
+        handle = self.emulator.handle
+
+        def handle_with_broken_last_warning(method, path, body):
+            if path == config.LAST_WARNING_ENDPOINT:
+                return 500, {"message": "Internal error"}
+            return handle(method, path, body)
+
+        self.emulator.handle = handle_with_broken_last_warning
+
+        problems = self.tracker.check()
+        self.assertEqual([problem["title"] for problem in problems], ["Input clipping"])
+
+    def test_last_problem_is_compared_by_time_and_message(self):
+        self.add_warning("Input clipping", 1.0)
+        self.tracker.mark()
+        # REW logged the same warning again: same title, new time
+        self.add_warning("Input clipping", 2.0)
+
+        self.assertEqual(len(self.tracker.check()), 1)
+
+    def test_restarted_rew_reports_every_problem(self):
+        self.add_warning("Old warning", 1.0)
+        self.add_warning("Other warning", 2.0)
+        self.tracker.mark()
+        self.emulator.warnings = [
+            {"time": 3.0, "title": "Input clipping", "message": "After restart"}
+        ]
+
+        self.assertEqual(len(self.tracker.check()), 1)
+
+
+class MeasurementIndexTest(EmulatorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = MeasurementIndex(self.client)
+
+    def test_added_measurements_are_collected_since_mark(self):
+        self.emulator._finish_sweep()
+        self.index.mark()
+        self.emulator._finish_sweep()
+        new_uuid = self.emulator.selected_uuid
+
+        self.assertEqual(self.index.take_added(), {new_uuid})
+        self.assertEqual(self.index.take_added(), set())
+
+    def test_renamed_measurement_keeps_its_summary(self):
+        # The module-level client and index are the ones update_measurement uses
+        self.addCleanup(setattr, rew_client, "base_url", rew_client.base_url)
+        rew_client.base_url = self.url
+        measurement_index.mark()
+        self.emulator._finish_sweep()
+        uuid = self.emulator.selected_uuid
+        measurement_index.take_added()
+
+        self.assertTrue(update_measurement(uuid, title="FL", notes="{}"))
+        summary_cache.get(uuid)
+        measurement_index.refresh()
+
+        self.assertIn(uuid, summary_cache.summaries)
+
+
+if __name__ == "__main__":
+    unittest.main()
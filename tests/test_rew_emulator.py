@@ -0,0 +1,70 @@
+"""Smoke tests that run the headless mode against the built-in REW emulator."""
+
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+MAIN = Path(__file__).resolve().parent.parent / "src" / "main.py"
+
+
+def run_headless(*arguments: str, channels=("FL", "FR")) -> tuple[int, list[dict]]:
+    """Run main.py --headless --emulator and return the exit code and the JSON records."""
+    with tempfile.TemporaryDirectory() as directory:
+        settings = Path(directory) / "settings.json"
+        settings.write_text(
+            json.dumps({channel: {"audio": channel} for channel in channels})
+        )
+        result = subprocess.run(
+            [sys.executable, str(MAIN), "--headless", "--emulator", *arguments],
+            cwd=directory,  # The event log and the journal are written here
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    records = [json.loads(line) for line in result.stdout.splitlines() if line]
+    return result.returncode, records
+
+
+class HeadlessEmulatorTest(unittest.TestCase):
+    def test_schedule_completes(self):
+        code, records = run_headless("--iterations", "2", "--answer", "abort")
+
+        self.assertEqual(code, 0)
+        finished = [record for record in records if record["event"] == "finished"]
+        self.assertEqual(len(finished), 1)
+        self.assertTrue(finished[0]["completed"])
+        self.assertFalse(any(record["event"] == "prompt" for record in records))
+
+    def test_problems_are_retried_until_the_prompt_limit(self):
+        # Every sweep clips: three attempts, a prompt, three more and a second prompt
+        problems = ["--emulator-problem=clipping"] * 6
+        code, records = run_headless(
+            "--no-mic-position",
+            "--answer",
+            "proceed",
+            "--max-prompts",
+            "1",
+            "--emulator-sweep-duration",
+            "0.2",
+            *problems,
+            channels=("FL",),
+        )
+
+        self.assertEqual(code, 1)
+        messages = [record["message"] for record in records if "message" in record]
+        self.assertEqual(
+            sum("New problem detected (clipping)" in message for message in messages), 6
+        )
+        self.assertTrue(any("Retrying step" in message for message in messages))
+        prompts = [record for record in records if record["event"] == "prompt"]
+        self.assertEqual(len(prompts), 1)
+        self.assertIn("Reached max attempts", prompts[0]["prompt"])
+        self.assertTrue(any(record["event"] == "prompt_limit" for record in records))
+        self.assertFalse(records[-1]["completed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
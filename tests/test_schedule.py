@@ -0,0 +1,127 @@
+"""Tests of the incremental schedule table."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from schedule import StepStatus, StepTable  # noqa: E402
+
+CHANNELS = {"FL": {"audio": "FL"}, "FR": {"audio": "FR"}}
+
+
+def sync(table: StepTable, **overrides):
+    settings = {
+        "channels": CHANNELS,
+        "iterations": 2,
+        "mic_position": False,
+        "reference": True,
+        "position_name": "Seat",
+    }
+    table.sync(**{**settings, **overrides})
+
+
+def get_sweeps(table: StepTable) -> list[tuple]:
+    return [
+        (step.channel, step.audio, step.iteration, step.position)
+        for step in table
+        if step.description == "Measure sweep"
+    ]
+
+
+class StepTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = StepTable()
+        sync(self.table)
+        self.table.take_changes()
+
+    def test_builds_the_schedule(self):
+        self.assertEqual(self.table[0].description, "Check REW settings")
+        self.assertEqual(
+            get_sweeps(self.table),
+            [
+                ("FL", "FL", "Reference", "Seat"),
+                ("FR", "FR", "Reference", "Seat"),
+                ("FL", "FL", "2", "Seat"),
+                ("FR", "FR", "2", "Seat"),
+            ],
+        )
+
+    def test_mic_position_adds_the_utility_steps(self):
+        sync(self.table, mic_position=True)
+
+        self.assertEqual(
+            [step.description for step in self.table][:4],
+            [
+                "Check REW settings",
+                "Measure distance",
+                "Measure distance",
+                "Check microphone position",
+            ],
+        )
+        self.assertEqual(len(get_sweeps(self.table)), 4)
+        self.assertEqual(self.table.take_changes(), (True, set()))
+
+    def test_more_iterations_keep_the_existing_rows(self):
+        self.table.set_status(1, StepStatus.COMPLETED)
+        self.table.take_changes()
+        sync(self.table, iterations=3)
+
+        self.assertEqual(len(self.table), 7)
+        self.assertEqual(self.table[1].status, StepStatus.COMPLETED)
+        self.assertEqual(get_sweeps(self.table)[-1], ("FR", "FR", "3", "Seat"))
+        self.assertTrue(self.table.take_changes()[0])
+
+    def test_fewer_iterations_drop_the_last_rows(self):
+        sync(self.table, iterations=1)
+
+        self.assertEqual(len(get_sweeps(self.table)), 2)
+
+    def test_audio_change_only_touches_that_channel(self):
+        sync(self.table, channels={"FL": {"audio": "C"}, "FR": {"audio": "FR"}})
+
+        self.assertEqual(self.table.take_changes(), (False, {1, 3}))
+        self.assertEqual(
+            [sweep[1] for sweep in get_sweeps(self.table)], ["C", "FR"] * 2
+        )
+
+    def test_reference_only_renames_the_first_iteration(self):
+        sync(self.table, reference=False)
+
+        self.assertEqual(self.table.take_changes(), (False, {1, 2}))
+        self.assertEqual(
+            [sweep[2] for sweep in get_sweeps(self.table)], ["1", "1", "2", "2"]
+        )
+
+    def test_position_change_touches_every_sweep(self):
+        sync(self.table, position_name="Couch")
+
+        self.assertEqual(self.table.take_changes(), (False, {1, 2, 3, 4}))
+        self.assertTrue(all(sweep[3] == "Couch" for sweep in get_sweeps(self.table)))
+
+    def test_new_channels_rebuild_the_schedule(self):
+        sync(self.table, channels={"C": {"audio": "C"}})
+
+        self.assertEqual(
+            get_sweeps(self.table),
+            [("C", "C", "Reference", "Seat"), ("C", "C", "2", "Seat")],
+        )
+        self.assertTrue(self.table.take_changes()[0])
+
+    def test_unchanged_settings_change_nothing(self):
+        sync(self.table)
+
+        self.assertEqual(self.table.take_changes(), (False, set()))
+
+    def test_reset_status_marks_only_the_rows_that_ran(self):
+        self.table.set_status(2, StepStatus.RETRYING)
+        self.table.take_changes()
+        self.table.reset_status()
+
+        self.assertEqual(self.table.take_changes(), (False, {2}))
+        self.assertEqual(self.table[2].status, StepStatus.NOT_STARTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
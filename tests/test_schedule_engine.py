@@ -0,0 +1,196 @@
+"""Tests of the schedule engine and the background verification pipeline."""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from event_log import event_log  # noqa: E402
+from pipeline import VerificationPipeline  # noqa: E402
+from schedule import Step, StepStatus, StepTable  # noqa: E402
+from schedule_engine import (  # noqa: E402
+    EngineState,
+    Outcome,
+    ScheduleEngine,
+    StepType,
+    Transition,
+    register_step_type,
+)
+from utils import CancelToken  # noqa: E402
+
+log_directory = tempfile.TemporaryDirectory()
+event_log.path = str(Path(log_directory.name) / "session_events.jsonl")
+
+executed: list[int] = []  # Indexes of the executed steps, in order
+verify_results: list[bool] = []  # Results of the next verifications, True once empty
+verify_gate = threading.Event()  # Verifications block until this is set
+
+
+@register_step_type("Test setup")
+class SetupStep(StepType):
+    def execute(self, engine, index):
+        executed.append(index)
+        return Transition(Outcome.COMPLETED)
+
+
+@register_step_type("Test sweep")
+class SweepStep(StepType):
+    def execute(self, engine, index):
+        executed.append(index)
+        engine.submit_verification(index)
+        return Transition(Outcome.VERIFYING)
+
+    def verify(self, engine, index):
+        verify_gate.wait(5)
+        return verify_results.pop(0) if verify_results else True
+
+
+@register_step_type("Test stop")
+class StopStep(StepType):
+    """Waits for the verification of the previous sweep like a sweep does, then stops."""
+
+    def execute(self, engine, index):
+        executed.append(index)
+        engine.pipeline.wait(engine.cancel_token)
+        engine.cancel_token.stop()
+        return Transition(Outcome.RETRY)
+
+
+class RecordingUI:
+    def __init__(self):
+        self.prompts = []
+        self.completed = False
+
+    def info(self, contents):
+        pass
+
+    def update(self):
+        pass
+
+    def input(self, contents):
+        self.prompts.append(contents)
+
+    def complete(self):
+        self.completed = True
+
+
+def make_table(*descriptions: str) -> StepTable:
+    table = StepTable()
+    table.steps = [Step(description) for description in descriptions]
+    return table
+
+
+class ScheduleEngineTest(unittest.TestCase):
+    def setUp(self):
+        executed.clear()
+        verify_results.clear()
+        verify_gate.set()
+        self.pipeline = VerificationPipeline()
+
+    def run_engine(self, table: StepTable, cancel_token=None) -> ScheduleEngine:
+        engine = ScheduleEngine(
+            table, RecordingUI(), cancel_token or CancelToken(), self.pipeline
+        )
+        engine.run()
+        return engine
+
+    def test_completes_every_step(self):
+        table = make_table("Test setup", "Test sweep", "Test sweep")
+        engine = self.run_engine(table)
+
+        self.assertIs(engine.state, EngineState.COMPLETED)
+        self.assertEqual(executed, [0, 1, 2])
+        self.assertTrue(all(step.status is StepStatus.COMPLETED for step in table))
+        self.assertTrue(engine.message_ui.completed)
+
+    def test_failed_verification_is_run_again(self):
+        verify_results.append(False)
+        table = make_table("Test setup", "Test sweep", "Test sweep")
+        engine = self.run_engine(table)
+
+        self.assertIs(engine.state, EngineState.COMPLETED)
+        self.assertEqual(executed.count(1), 2)
+        self.assertEqual(table[1].status, StepStatus.COMPLETED)
+
+    def test_stop_then_restart_starts_with_the_first_step(self):
+        # The sweep fails verification and the stop step collects that failure
+        verify_results.append(False)
+        table = make_table("Test setup", "Test sweep", "Test stop")
+        engine = self.run_engine(table)
+        self.assertIs(engine.state, EngineState.STOPPED)
+
+        executed.clear()
+        table.steps[2] = Step("Test sweep")
+        engine = self.run_engine(table)
+
+        self.assertIs(engine.state, EngineState.COMPLETED)
+        self.assertEqual(executed, [0, 1, 2])
+        self.assertEqual(self.pipeline.take_failed(), [])
+
+    def test_restart_with_a_shorter_schedule(self):
+        verify_results.append(False)
+        self.run_engine(make_table("Test setup", "Test sweep", "Test stop"))
+
+        executed.clear()
+        engine = self.run_engine(make_table("Test setup"))
+
+        self.assertIs(engine.state, EngineState.COMPLETED)
+        self.assertEqual(executed, [0])
+
+    def test_stopped_verification_leaves_the_next_run_alone(self):
+        verify_gate.clear()
+        cancel_token = CancelToken()
+        table = make_table("Test setup", "Test sweep", "Test sweep")
+        engine = ScheduleEngine(table, RecordingUI(), cancel_token, self.pipeline)
+        worker = threading.Thread(target=engine.run)
+        worker.start()
+        while table[2].status is not StepStatus.VERIFYING:
+            time.sleep(0.01)
+
+        cancel_token.stop()
+        worker.join(1)
+        self.assertFalse(worker.is_alive(), "the stop waited for the verification")
+        self.assertIs(engine.state, EngineState.STOPPED)
+        self.assertIsNotNone(cancel_token.stop_latency)
+
+        table.reset_status()
+        verify_results.extend([False, False])
+        verify_gate.set()
+        self.assertTrue(self.pipeline.reset())
+        self.assertTrue(all(step.status is StepStatus.NOT_STARTED for step in table))
+
+
+class VerificationPipelineTest(unittest.TestCase):
+    def test_wait_returns_when_stopped(self):
+        pipeline = VerificationPipeline()
+        gate = threading.Event()
+        pipeline.submit(0, gate.wait, 5)
+        cancel_token = CancelToken()
+        threading.Timer(0.05, cancel_token.stop).start()
+
+        start = time.perf_counter()
+        self.assertFalse(pipeline.wait(cancel_token))
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(pipeline.has_pending())
+
+        gate.set()
+        self.assertTrue(pipeline.wait())
+        self.assertEqual(pipeline.take_failed(), [])
+
+    def test_failed_and_raising_verifications_are_collected(self):
+        pipeline = VerificationPipeline()
+        pipeline.submit(0, lambda: True)
+        pipeline.submit(1, lambda: False)
+        pipeline.submit(2, lambda: 1 / 0)
+
+        self.assertTrue(pipeline.wait())
+        self.assertEqual(pipeline.take_failed(), [1, 2])
+        self.assertEqual(pipeline.take_failed(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
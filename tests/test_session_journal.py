@@ -0,0 +1,74 @@
+"""Tests of resuming a session from the journal."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from schedule import Step  # noqa: E402
+from session_journal import SessionJournal  # noqa: E402
+
+FL = Step("Measure sweep", "FL", "FL", "Reference", "Seat")
+FR = Step("Measure sweep", "FR", "FR", "Reference", "Seat")
+
+
+class SessionJournalTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "session_journal.jsonl"
+        self.journal = SessionJournal(str(self.path))
+
+    def test_completed_step_is_skipped_after_a_restart(self):
+        self.journal.record(FL, {"a", "b"})
+
+        resumed = SessionJournal(str(self.path))
+        self.assertTrue(resumed.is_completed(FL, {"a", "b", "c"}))
+        self.assertFalse(resumed.is_completed(FR, {"a", "b", "c"}))
+
+    def test_step_is_measured_again_when_rew_lost_a_measurement(self):
+        self.journal.record(FL, {"a", "b"})
+
+        self.assertFalse(SessionJournal(str(self.path)).is_completed(FL, {"a"}))
+
+    def test_step_is_identified_by_its_fields(self):
+        self.journal.record(FL, {"a"})
+        moved = Step("Measure sweep", "FL", "FL", "Reference", "Couch")
+
+        self.assertFalse(self.journal.is_completed(moved, {"a"}))
+
+    def test_latest_record_wins(self):
+        self.journal.record(FL, {"a"})
+        self.journal.record(FL, {"b"})
+
+        resumed = SessionJournal(str(self.path))
+        self.assertFalse(resumed.is_completed(FL, {"a"}))
+        self.assertTrue(resumed.is_completed(FL, {"b"}))
+
+    def test_partially_written_line_is_ignored(self):
+        self.journal.record(FL, {"a"})
+        with open(self.path, "a") as f:
+            f.write('{"key": "Measure sweep|FR')
+
+        resumed = SessionJournal(str(self.path))
+        self.assertTrue(resumed.is_completed(FL, {"a"}))
+        self.assertFalse(resumed.is_completed(FR, {"a"}))
+
+    def test_step_without_measurements_is_not_completed(self):
+        self.journal.record(FL, set())
+
+        self.assertFalse(self.journal.is_completed(FL, {"a"}))
+
+    def test_clear_starts_a_new_session(self):
+        self.journal.record(FL, {"a"})
+        self.journal.clear()
+
+        self.assertFalse(self.path.exists())
+        self.assertFalse(self.journal.is_completed(FL, {"a"}))
+        self.assertFalse(SessionJournal(str(self.path)).is_completed(FL, {"a"}))
+
+
+if __name__ == "__main__":
+    unittest.main()